@@ -0,0 +1,213 @@
+"""
+Benchmarks the unit conversion scanner in ``nekocogs.conv``.
+
+Replays the chat lines in ``conv_corpus.txt`` through ``_find_tokens`` and
+``_find_any_conversions`` and reports:
+
+- messages per second for each of the two stages;
+- allocations per message (memory blocks still held by the results, as
+  reported by ``tracemalloc``) and the peak memory per message;
+- the false positive rate (conversions for units that were not expected) and
+  the false negative rate (expected units we did not convert);
+- how many lines marked with a dash had anything converted at all. These
+  are lines we know we get wrong, so the threshold for this is zero.
+
+These are then checked against ``conv_thresholds.json``. If any threshold is
+not met, we exit with a non-zero status.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_conv [--repeat N] [--no-check]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Allow running this as a script, not just as a module.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nekocogs import conv
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+corpus_file = os.path.join(here, 'conv_corpus.txt')
+thresholds_file = os.path.join(here, 'conv_thresholds.json')
+
+
+def load_corpus(path=corpus_file):
+    """
+    Loads the corpus, returning a list of tuples of the message, and the list
+    of Unit names we expect to be converted from it, in order.
+    """
+    corpus = []
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+
+            expected, message = line.split('\t', 1)
+            expected = [] if expected == '-' else expected.split(',')
+            corpus.append((message.replace('\\n', '\n'), expected))
+    return corpus
+
+
+def _units_in(results):
+    """Gets the Unit names of each valid input measurement in the results."""
+    return [r[0].unit.name for r in results if not isinstance(r[0], str)]
+
+
+def measure_accuracy(corpus):
+    """
+    Returns the false positive and false negative rates across the corpus,
+    and a list of the messages expecting no conversions that got some.
+
+    A false positive is a converted unit that was not expected; a false
+    negative is an expected unit that was not converted.
+    """
+    false_pos = false_neg = produced = expected_total = 0
+    spurious = []
+
+    for message, expected in corpus:
+        got = _units_in(conv._find_any_conversions(message))
+
+        remaining = list(expected)
+        for unit in got:
+            if unit in remaining:
+                remaining.remove(unit)
+            else:
+                false_pos += 1
+
+        if got and not expected:
+            spurious.append(message)
+
+        false_neg += len(remaining)
+        produced += len(got)
+        expected_total += len(expected)
+
+    return (false_pos / produced if produced else 0.0,
+            false_neg / expected_total if expected_total else 0.0,
+            spurious)
+
+
+def measure_throughput(func, messages, repeat):
+    """Returns how many messages per second func can get through."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            func(message)
+    return len(messages) * repeat / (time.perf_counter() - start)
+
+
+def convert_uncached(message):
+    """
+    Finds and converts everything in the message with an empty conversion
+    cache, so that timing this measures the conversions themselves rather
+    than cache hits.
+    """
+    conv._convert_cached.cache_clear()
+    return conv._find_all_conversions(message)
+
+
+def measure_allocations(messages):
+    """
+    Returns the mean number of memory blocks, and the mean peak bytes, that
+    scanning and converting a message allocates. Results are kept alive
+    until the end so that they are counted.
+    """
+    kept = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for message in messages:
+            kept.append(list(conv._find_any_conversions(message)))
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, 'filename')
+        if stat.count_diff > 0
+    )
+
+    return blocks / len(messages), peak / len(messages)
+
+
+def run(repeat=200):
+    """Runs every benchmark and returns the results as a dict."""
+    corpus = load_corpus()
+    messages = [message for message, _ in corpus]
+
+    # Warm up, so we do not measure regex compilation or first-call costs.
+    for message in messages:
+        conv._find_any_conversions(message)
+
+    # The conversion cache would otherwise hide the cost of conversion.
+    # Throughput is measured with convert_uncached for the same reason.
+    conv._convert_cached.cache_clear()
+    false_pos, false_neg, spurious = measure_accuracy(corpus)
+    conv._convert_cached.cache_clear()
+    allocations, peak = measure_allocations(messages)
+
+    return {
+        'corpus_lines': len(corpus),
+        'tokenise_messages_per_second':
+            measure_throughput(conv._find_tokens, messages, repeat),
+        'convert_messages_per_second':
+            measure_throughput(convert_uncached, messages, repeat),
+        'allocations_per_message': allocations,
+        'peak_bytes_per_message': peak,
+        'false_positive_rate': false_pos,
+        'false_negative_rate': false_neg,
+        'expected_none_converted': len(spurious),
+        'spurious_messages': spurious,
+    }
+
+
+def check(results, thresholds):
+    """Returns a list of strings describing each threshold not met."""
+    failures = []
+    for key, minimum in thresholds.get('minimum', {}).items():
+        if results[key] < minimum:
+            failures.append(f'{key} = {results[key]:.4g} < {minimum}')
+    for key, maximum in thresholds.get('maximum', {}).items():
+        if results[key] > maximum:
+            failures.append(f'{key} = {results[key]:.4g} > {maximum}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='how many times to replay the corpus for timing')
+    parser.add_argument('--no-check', action='store_true',
+                        help='only report, do not check the thresholds')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    spurious = results.pop('spurious_messages')
+    for key, value in results.items():
+        print(f'{key:>32}: {value:,.4f}')
+    for message in spurious:
+        print(f'Converted something in: {message!r}', file=sys.stderr)
+
+    if args.no_check:
+        return
+
+    with open(thresholds_file) as fp:
+        failures = check(results, json.load(fp))
+
+    if failures:
+        print('\nThresholds not met:', *failures, sep='\n  ', file=sys.stderr)
+        exit(1)
+    else:
+        print('\nAll thresholds met.')
+
+
+if __name__ == '__main__':
+    main()
@@ -9,13 +9,22 @@ Plus... NEKO!!! >'^w^<
 """
 
 # Expects each file to have __all__ defined
+from .blockingio import *
 from .book import *
+from .bulkdelete import *
 from .client import *
 from .cog import *
 from .command import *
 from .common import *
+from .errorlog import *
 from .io import *
+from .metrics import *
+from .reactions import *
+from .router import *
+from .scheduler import *
+from .stats import *
 from .safeembed import *
+from .watchdog import *
 from .strings import *
 from .deque import *
 
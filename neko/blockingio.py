@@ -0,0 +1,249 @@
+"""
+Debugging aid that finds blocking I/O done on the event loop thread.
+
+Opening files, resolving host names, connecting blocking sockets, starting
+processes and sleeping all hold up the whole bot when done on the loop
+thread, but nothing complains about it; the bot just gets slower. The
+``BlockingCallDetector`` installs an audit hook (see ``sys.addaudithook``)
+that notices these calls when they are made on the loop thread, and works
+out which cog, command and line of our code made them.
+
+Audit hooks need Python 3.8 or newer, and ``time.sleep`` only raises an
+audit event from 3.12; before then, long sleeps still show up as stalls in
+the ``LoopWatchdog``. Audit hooks cannot be removed once added, so the
+detector can only be switched off, which leaves the hook doing a set lookup
+per audit event.
+"""
+import collections
+import datetime
+import os
+import sys
+import threading
+import typing
+
+import neko.cog as cog
+import neko.other.log as log
+
+__all__ = ['BlockingCallDetector', 'BlockingCall']
+
+
+# Audit events that block the calling thread.
+_blocking_events = frozenset({
+    'open',
+    'os.system',
+    'os.posix_spawn',
+    'subprocess.Popen',
+    'socket.connect',
+    'socket.sendto',
+    'socket.getaddrinfo',
+    'socket.gethostbyname',
+    'socket.gethostbyaddr',
+    'socket.getnameinfo',
+    'time.sleep',
+})
+
+# Events whose first argument is the socket. These only block if the socket
+# does; asyncio itself does these with non-blocking sockets all the time.
+_socket_events = frozenset({'socket.connect', 'socket.sendto'})
+
+# Anything in here that is not this module is "our" code.
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_this_file = os.path.abspath(__file__)
+
+# How many frames up the stack to look for who made the call.
+_max_depth = 64
+
+
+class BlockingCall:
+    """
+    Blocking calls of one kind made from one line of our code.
+
+    ``site`` is the file, line and function in the bot that made the call,
+    or None if no frame belonging to the bot was found.
+    """
+    __slots__ = ('event', 'detail', 'site', 'cog', 'command', 'count',
+                 'first_seen', 'last_seen')
+
+    def __init__(self, event: str, site: typing.Optional[tuple]):
+        self.event = event
+        self.site = site
+        self.detail = None
+        self.cog = None
+        self.command = None
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+
+    @property
+    def where(self) -> str:
+        """Describes the site as file:line in function."""
+        if self.site is None:
+            return 'outside the bot'
+        file, line, function = self.site
+        return f'{os.path.relpath(file, _root)}:{line} in {function}'
+
+
+class BlockingCallDetector(log.Loggable):
+    """
+    Records blocking calls made on the thread that called ``enable``.
+
+    :param max_sites: how many distinct call sites to remember. Once full,
+            the one seen least recently is forgotten.
+    """
+
+    def __init__(self, max_sites: int = 256):
+        self.max_sites = max_sites
+        self.enabled = False
+        self._thread_id = None
+        self._hooked = False
+        # (event, site) -> BlockingCall, least recently seen first.
+        self._calls: typing.Dict[tuple, BlockingCall] = (
+            collections.OrderedDict())
+
+    @property
+    def supported(self) -> bool:
+        return hasattr(sys, 'addaudithook')
+
+    def __len__(self):
+        return len(self._calls)
+
+    def enable(self):
+        """
+        Starts flagging blocking calls on the current thread, which should
+        be the thread running the event loop.
+
+        :raises RuntimeError: if this version of Python has no audit hooks.
+        """
+        if not self.supported:
+            raise RuntimeError(
+                'Detecting blocking calls needs Python 3.8 or newer.')
+
+        self._thread_id = threading.get_ident()
+        if not self._hooked:
+            sys.addaudithook(self._hook)
+            self._hooked = True
+        self.enabled = True
+        self.logger.info('Flagging blocking calls on the event loop thread.')
+
+    def disable(self):
+        """Stops flagging blocking calls. Anything recorded is kept."""
+        self.enabled = False
+
+    def clear(self):
+        self._calls.clear()
+
+    def calls(self) -> typing.List[BlockingCall]:
+        """Gets the calls recorded, most frequent first."""
+        return sorted(self._calls.values(),
+                      key=lambda c: (c.count, c.last_seen),
+                      reverse=True)
+
+    def summary(self, limit: int = 10) -> str:
+        """Describes the most frequent calls, one per line."""
+        calls = self.calls()
+        if not calls:
+            return 'No blocking calls were made on the event loop thread.'
+
+        lines = [f'{len(calls)} places made blocking calls on the event loop '
+                 f'thread. The most frequent are:']
+        for call in calls[:limit]:
+            lines.append(f'  {call.count:>5}x {call.event} ({call.detail}) '
+                         f'at {call.where}, cog {call.cog or "-"}, '
+                         f'command {call.command or "-"}')
+        return '\n'.join(lines)
+
+    def _hook(self, event, args):
+        # This runs for every audit event on every thread, so bail out as
+        # early as we can. It must never raise, as that would propagate into
+        # whatever raised the event.
+        if event not in _blocking_events:
+            return
+        if not self.enabled or threading.get_ident() != self._thread_id:
+            return
+
+        try:
+            if event in _socket_events and args[0].gettimeout() == 0.0:
+                return
+            self._record(event, args, sys._getframe(1))
+        except Exception:
+            pass
+
+    def _record(self, event, args, frame):
+        site, cog_name, command = _attribute(frame)
+        key = (event, site)
+        call = self._calls.get(key)
+
+        if call is None:
+            call = BlockingCall(event, site)
+            self._calls[key] = call
+            while len(self._calls) > self.max_sites:
+                self._calls.popitem(last=False)
+        else:
+            self._calls.move_to_end(key)
+
+        now = datetime.datetime.now()
+        call.count += 1
+        call.first_seen = call.first_seen or now
+        call.last_seen = now
+        call.detail = _describe(event, args)
+        call.cog = cog_name or call.cog
+        call.command = command or call.command
+
+
+def _is_ours(file: str) -> bool:
+    return (file.startswith(_root)
+            and file != _this_file
+            and 'site-packages' not in file)
+
+
+def _describe(event, args) -> str:
+    """Gets the interesting argument of the event, such as the file name."""
+    if event in _socket_events or event == 'subprocess.Popen':
+        detail = args[1]
+    elif args:
+        detail = args[0]
+    else:
+        detail = ''
+    if isinstance(detail, bytes):
+        detail = detail.decode(errors='replace')
+    detail = str(detail)
+    if len(detail) > 80:
+        detail = detail[:79] + '\N{HORIZONTAL ELLIPSIS}'
+    return detail
+
+
+def _attribute(frame) -> typing.Tuple[typing.Optional[tuple],
+                                      typing.Optional[str],
+                                      typing.Optional[str]]:
+    """
+    Walks up the stack to find the innermost frame in our code, the cog
+    whose method is running, and the command being invoked, if any.
+    """
+    site = cog_name = command = None
+    depth = 0
+
+    while frame is not None and depth < _max_depth:
+        code = frame.f_code
+        file = code.co_filename
+
+        if site is None and _is_ours(file):
+            site = (file, frame.f_lineno, code.co_name)
+
+        if cog_name is None or command is None:
+            f_locals = frame.f_locals
+            owner = f_locals.get('self')
+            if cog_name is None and isinstance(owner, cog.Cog):
+                cog_name = owner.name
+
+            ctx = f_locals.get('ctx')
+            ctx_command = getattr(ctx, 'command', None)
+            if command is None and ctx_command is not None:
+                command = getattr(ctx_command, 'qualified_name', None)
+
+        if site and cog_name and command:
+            break
+
+        frame = frame.f_back
+        depth += 1
+
+    return site, cog_name, command
@@ -9,9 +9,16 @@ import traceback
 
 import neko
 
-__all__ = ['Button', 'Page', 'Book', 'PaginatedBook']
+__all__ = ['Button', 'Page', 'PageFactory', 'Book', 'PaginatedBook',
+           'BookManager']
 
 import asyncio
+import collections
+import gzip
+import inspect
+import io
+import sys
+import time
 import typing
 
 import discord
@@ -19,6 +26,7 @@ import discord.ext.commands as commands
 
 from neko import common
 from neko import safeembed
+from neko import strings
 
 
 class Page(safeembed.SafeEmbed):
@@ -84,23 +92,57 @@ class Button:
             return decorator
 
 
+# Something that renders a page when it is first shown. This is called with
+# no arguments, and may return either a page, or an awaitable page.
+PageFactory = typing.Callable[[], typing.Union[Page, typing.Awaitable[Page]]]
+
+
+def _sizeof(obj) -> int:
+    """Sums sys.getsizeof over a tree of dicts, lists and tuples."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(item) for item in obj)
+    return size
+
+
 class Book:
     """
     A book is a collection of pages, along with an associated page number.
+
+    Pages do not have to be rendered up front. A page factory can be added
+    in place of a page, and this will only be called the first time the page
+    is shown. The result is then cached in place of the factory. Likewise, an
+    async iterable of pages can be set as the source of any further pages,
+    and these are only consumed as far as the reader gets.
     """
     __slots__ = (
-        'pages',  # Collection of embeds.
+        'pages',  # Collection of embeds, or factories to render them with.
         '_page_index',  # 0-based page index. Access via `index` or `page_no`.
         'buttons',  # Collection of buttons.
         '_ctx',  # The context to reply to.
         '_msg',  # The message containing the current page. This is set on send.
-        'timeout'  # How long to idle for before destroying pagination.
+        'timeout',  # How long to idle for before destroying pagination.
+        '_source',  # Async iterator of any pages not yet in `pages`.
+        '_estimated_total',  # Estimated page count while _source is unread.
+        '_payloads',  # Maps id(page) to (page, frozen payload) once shown.
+        '_editing',  # True while an edit of _msg is in flight.
+        '_displayed',  # (content, payload) that _msg was last edited to show.
+        '_decayed',  # True once the pagination has been finalised.
+        '_task',  # The future running the send loop, once sent.
+        'opened_at',  # time.monotonic() when this was sent, or None.
+        'spill_threshold',  # Most pages to paginate before sending a file.
     )
 
+    #: Spilled output larger than this many bytes is gzipped.
+    spill_compress_over = 1024 * 1024
+
     def __init__(self,
                  ctx: commands.Context,
                  timeout: float = 120,
-                 buttons: typing.Iterable = None):
+                 buttons: typing.Iterable = None,
+                 spill_threshold: int = None):
         """
         Initialises the pages.
         :param ctx: the message context we are replying to.
@@ -108,9 +150,25 @@ class Book:
                 buttons are generated instead.
         :param timeout: time to wait before destroying pagination.
                 Defaults to 120 seconds.
+        :param spill_threshold: if there are more pages than this when the
+                book is sent, then the pages are uploaded as a single file
+                with a summary embed instead. This defaults to the bot's
+                ``book_spill_threshold``. Set to 0 to never do this.
         """
         self.pages = []
         self._page_index = 0
+        self._source = None
+        self._estimated_total = None
+        self._payloads = {}
+        self._editing = False
+        self._displayed = None
+        self._decayed = False
+        self._task = None
+        self.opened_at = None
+
+        if spill_threshold is None:
+            spill_threshold = getattr(ctx.bot, 'book_spill_threshold', 0)
+        self.spill_threshold = spill_threshold
 
         if timeout <= 0:
             raise ValueError('Timeout must be positive and nonzero.')
@@ -171,18 +229,89 @@ class Book:
         Sets the page number. This is a one-based index and does not wrap
         around like index does.
         """
-        if 0 < new <= len(self.pages):
+        if 0 < new <= len(self):
             self._page_index = new - 1
         else:
             raise IndexError(
-                f'Page number {new} is outside range [1...{len(self.pages)}]'
+                f'Page number {new} is outside range [1...{len(self)}]'
             )
 
     @property
-    def page(self) -> Page:
-        """Gets the current page."""
+    def page(self) -> typing.Union[Page, PageFactory]:
+        """
+        Gets the current page. If this has not been shown yet, this may be
+        the factory that will render it. Use ``render_page`` to ensure it is
+        a page.
+        """
         return self.pages[self._page_index]
 
+    @property
+    def is_total_known(self) -> bool:
+        """True if we know exactly how many pages there are."""
+        return self._source is None
+
+    def add_page_factory(self, factory: PageFactory):
+        """
+        Adds a callable to the end of the book that renders the page the
+        first time it is shown. This may be a coroutine function.
+        """
+        if not callable(factory):
+            raise TypeError('Expected callable page factory.')
+        else:
+            self.pages.append(factory)
+
+    def set_source(self,
+                   source: typing.AsyncIterable[typing.Union[Page,
+                                                             PageFactory]],
+                   estimated_total: int = None):
+        """
+        Sets an async iterable to lazily read further pages from once the
+        reader goes past the pages already in the book.
+
+        :param source: the async iterable of pages or page factories.
+        :param estimated_total: an estimate of how many pages there will be
+                in total, including those already in the book. This is shown
+                to the user until the source is exhausted. If unspecified,
+                we only ever claim one more page than we have read.
+        """
+        self._source = source.__aiter__()
+        self._estimated_total = estimated_total
+
+    async def render_page(self, index: int = None) -> Page:
+        """
+        Ensures the page at the given zero-based index (or the current page
+        if unspecified) is rendered, and returns it.
+
+        If the source runs out before reaching the index, we settle on the
+        last page instead.
+        """
+        if index is None:
+            index = self._page_index
+
+        while index >= len(self.pages) and self._source is not None:
+            try:
+                self.pages.append(await self._source.__anext__())
+            except StopAsyncIteration:
+                self._source = None
+
+        if index >= len(self.pages):
+            index = max(0, len(self.pages) - 1)
+            self._page_index = index
+
+        page = self.pages[index]
+
+        if not isinstance(page, Page):
+            page = page()
+            if inspect.isawaitable(page):
+                page = await page
+
+            if not isinstance(page, Page):
+                raise TypeError(f'Page factory gave {page!r}, not a Page.')
+
+            self.pages[index] = page
+
+        return page
+
     def add_page(self, *, index=None, **kwargs) -> discord.Embed:
         """
         Attempts to create an embed from the given kwargs, adding it
@@ -210,8 +339,14 @@ class Book:
         yield from self.pages
 
     def __len__(self):
-        """Counts the pages."""
-        return len(self.pages)
+        """
+        Counts the pages. If the pages are still being read from a source,
+        this is an estimate.
+        """
+        if self._source is None:
+            return len(self.pages)
+        else:
+            return max(len(self.pages) + 1, self._estimated_total or 0)
 
     def __contains__(self, item):
         """True if the given item is a page in the collection."""
@@ -267,6 +402,10 @@ class Book:
         will consume more and more memory over time, and likely
         degrade performance.
         """
+        if not self.pages and self._source is not None:
+            # Find out if the source is empty before committing to anything.
+            await self.render_page(0)
+
         if len(self.pages) == 0:
             page = Page(
                 title='*HISS*',
@@ -280,9 +419,117 @@ class Book:
                                  'embed. A duck was shot, and a cat got sick, '
                                  'but that was about it.')
             
-            await self._ctx.send(embed=page, delete_after=10)
-        else:    
-            ensure_future(self._send_loop())
+            msg = await self._ctx.send(embed=page)
+            self._ctx.bot.scheduler.delete_later(10, msg)
+        elif not (self._should_spill() and await self._spill()):
+            manager = getattr(self._ctx.bot, 'book_manager', None)
+            if manager is not None:
+                manager.register(self)
+
+            self.opened_at = time.monotonic()
+            self._task = ensure_future(self._run(manager))
+
+    def _should_spill(self) -> bool:
+        """
+        True if there are too many pages to sensibly flip through. Only
+        books whose pages are all rendered are spilled, as rendering
+        everything would defeat the point of lazy pages.
+        """
+        return (
+            bool(self.spill_threshold)
+            and self.is_total_known
+            and len(self.pages) > self.spill_threshold
+            and all(isinstance(page, Page) for page in self.pages))
+
+    def _spill_text(self) -> str:
+        """Renders every page as one markdown document."""
+        sections = []
+        for page in self.pages:
+            page = page.to_dict()
+            section = []
+            if page.get('title'):
+                section.append(f'# {page["title"]}')
+            if page.get('description'):
+                section.append(page['description'])
+            for field in page.get('fields', ()):
+                section.append(f'## {field["name"]}\n{field["value"]}')
+            sections.append('\n\n'.join(section))
+        return '\n\n---\n\n'.join(sections) + '\n'
+
+    async def _spill(self):
+        """
+        Uploads the whole book as a single file, along with a one-page
+        summary, rather than paginating it. This costs one upload instead of
+        an edit per page flip and a listener for the whole timeout.
+
+        :returns: False if we could not upload the file, such as when we
+                cannot attach files in this channel, in which case the book
+                should be paginated as normal.
+        """
+        text = self._spill_text()
+        data = text.encode('utf-8')
+
+        command = self._ctx.command
+        name = command.qualified_name if command else 'output'
+        name = name.replace(' ', '-') + '.md'
+
+        if len(data) > self.spill_compress_over:
+            data = gzip.compress(data)
+            name += '.gz'
+
+        first = self.pages[0].to_dict()
+        if 'description' in first:
+            preview = strings.ellipses(first['description'], 1000)
+            if preview.count('```') % 2:
+                preview += '\n```'
+        else:
+            preview = safeembed.EmptyEmbedField
+        summary = Page(title=first.get('title', 'Output'), description=preview)
+        summary.set_footer(
+            text=f'{len(self.pages)} pages, {len(text):,} characters. '
+                 'Too long to flip through, so it is attached as a file.')
+
+        try:
+            await self._ctx.send(embed=summary, file=discord.File(
+                io.BytesIO(data), filename=name))
+        except discord.HTTPException:
+            # Forbidden is a subclass of this.
+            return False
+        else:
+            return True
+
+    async def _run(self, manager):
+        """Runs the send loop, and unregisters from the manager after."""
+        try:
+            await self._send_loop()
+        finally:
+            if manager is not None:
+                manager.unregister(self)
+
+    def close(self):
+        """
+        Stops listening for reactions and decays the pagination. This is
+        used to evict books when too many are open.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        if getattr(self, '_msg', None) is not None and not self._decayed:
+            self.decay()
+
+    def approximate_size(self) -> int:
+        """
+        Approximates how many bytes the pages and payloads in this book take
+        up. Pages that are yet to be rendered are counted as their factory.
+        """
+        size = sys.getsizeof(self.pages) + sys.getsizeof(self._payloads)
+        for page in self.pages:
+            if isinstance(page, Page):
+                cached = self._payloads.get(id(page))
+                payload = cached[1] if cached else page
+                size += _sizeof(payload.to_dict())
+            else:
+                size += sys.getsizeof(page)
+        return size
 
     async def _send_loop(self):
         # If no page has been shown yet, send a placeholder message.
@@ -292,22 +539,23 @@ class Book:
 
             ensure_future(self._reset_buttons())
 
-        ensure_future(self._update_page())
+        await self.render_page()
+        self._request_update()
 
         try:
             def check(_react, _user):
                 return (_react.emoji in self.buttons.keys()
-                        and _react.message.id == self._msg.id
                         and _user.id in (
                             self._ctx.author.id, self._ctx.bot.owner_id))
 
-            react, member = await self._ctx.bot.wait_for(
-                'reaction_add',
+            react, member = await self._ctx.bot.reaction_router.wait_for(
+                self._msg.id,
                 timeout=self.timeout,
                 check=check
             )
 
-            ensure_future(self._msg.remove_reaction(react.emoji, member))
+            ensure_future(self._ctx.bot.reaction_pipeline.remove(
+                self._msg, react.emoji, member))
         except asyncio.TimeoutError:
             # Kills the pagination.
             self.decay()
@@ -316,17 +564,15 @@ class Book:
 
     async def _reset_buttons(self):
         """
-        Clears all reactions and displays the
-        current buttons in insertion order.
+        Displays the current buttons in insertion order. Only the reactions
+        that differ from what is already on the message are changed.
         """
-        await self._msg.clear_reactions()
-        # Must await to ensure correct ordering.
         if len(self) > 1:
-            [await self._msg.add_reaction(btn) for btn in self.buttons]
+            wanted = self.buttons.keys()
         else:
-            for emoji, btn in self.buttons.items():
-                if btn.always_show:
-                    await self._msg.add_reaction(emoji)
+            wanted = (e for e, btn in self.buttons.items() if btn.always_show)
+
+        await self._ctx.bot.reaction_pipeline.reconcile(self._msg, wanted)
 
     async def _msg_content(self):
         """
@@ -335,18 +581,59 @@ class Book:
         This does not call another coroutine. However, it exists to be
         await-able in order to allow overriding this message.
         """
-        return f'Page {self.page_no} of {len(self)}'
+        if self.is_total_known:
+            return f'Page {self.page_no} of {len(self)}'
+        else:
+            return f'Page {self.page_no} of ~{len(self)}'
+
+    def _payload_for(self, page: Page) -> safeembed.FrozenEmbed:
+        """
+        Gets the frozen payload for the given page, serialising it the first
+        time only. Flipping back to a page then costs nothing to serialise.
+        """
+        cached = self._payloads.get(id(page))
+
+        if cached is None or cached[0] is not page:
+            cached = page, safeembed.FrozenEmbed(page)
+            self._payloads[id(page)] = cached
+
+        return cached[1]
+
+    def _request_update(self):
+        """
+        Requests that the message be edited to show the current state of
+        this Book.
+
+        At most one edit is ever in flight per Book. If one is already
+        running, it will pick up the latest state once it completes, so any
+        intermediate pages flipped through while waiting on Discord are
+        never sent. This keeps us clear of the message edit rate limit when
+        someone hammers the buttons.
+        """
+        if not self._editing:
+            self._editing = True
+            ensure_future(self._update_page())
 
     async def _update_page(self):
         """
-        Forces the current page to be edited to reflect the current page
-        in this Book. This will not touch reactions.
+        Edits the message until it reflects the current page in this Book.
+        Edits that would not change what is displayed are skipped. This will
+        not touch reactions. Use ``_request_update`` rather than awaiting
+        this directly.
         """
         try:
-            await self._msg.edit(
-                content=await self._msg_content(),
-                embed=self.page
-            )
+            while True:
+                if self._decayed:
+                    content = ''
+                else:
+                    content = await self._msg_content()
+                payload = self._payload_for(await self.render_page())
+
+                if self._displayed == (content, payload):
+                    break
+
+                await self._msg.edit(content=content, embed=payload)
+                self._displayed = (content, payload)
         except discord.HTTPException as ex:
             traceback.print_exc()
             await self._msg.edit(
@@ -354,19 +641,21 @@ class Book:
                         'Please accept this basket of sympathy oranges. '
                         'https://thumbs.dreamstime.com/b/basket-oranges'
                         '-12173131.jpg')
-            await self._msg.clear_reactions()
+            await self._ctx.bot.reaction_pipeline.clear(self._msg)
             self._ctx.bot.last_error = neko.LastError(
                 type(ex), ex, ex.__traceback__)
-            await asyncio.sleep(10)
-            await self._msg.delete()
+            self._ctx.bot.scheduler.delete_later(10, self._msg)
+        finally:
+            self._editing = False
 
     def decay(self):
         """
         Makes the pagination decay into an embed. This effectively
         finalises this element.
         """
-        ensure_future(self._msg.clear_reactions())
-        ensure_future(self._msg.edit(content=''))
+        self._decayed = True
+        ensure_future(self._ctx.bot.reaction_pipeline.clear(self._msg))
+        self._request_update()
 
     @staticmethod
     def generate_buttons() -> typing.List[Button]:
@@ -401,21 +690,19 @@ class Book:
             )
 
             try:
+                ctx = book.context_invoked_from
+
                 def check(message):
-                    ctx = book.context_invoked_from
-                    return (
-                        message.channel == ctx.channel and
-                        message.author.id == ctx.author.id
-                    )
+                    return message.author.id == ctx.author.id
 
                 while True:
-                    reply = await book._ctx.bot.wait_for(
-                        'message',
+                    reply = await ctx.bot.message_router.wait_for(
+                        ctx.channel.id,
                         timeout=30,
                         check=check
                     )
                     try:
-                        await reply.delete()
+                        ctx.bot.deleter.queue(reply)
                         reply.content = reply.content.strip()
                         i = int(reply.content)
                         is_offset = reply.content.startswith('+') or i < 0
@@ -426,20 +713,18 @@ class Book:
                                 raise ValueError()
                             else:
                                 book.page_no = i
-                        await prompt.delete()
+                        ctx.bot.deleter.queue(prompt)
                         break
                     except ValueError:
-                        await book._ctx.send(
-                            'Invalid input. Try again.',
-                            delete_after=10
-                        )
+                        msg = await book._ctx.send('Invalid input. Try again.')
+                        ctx.bot.scheduler.delete_later(10, msg)
             except asyncio.TimeoutError:
-                await book._ctx.send(
-                    'Took too long.',
-                    delete_after=10
-                )
-            finally:
-                await book._send_loop()
+                msg = await book._ctx.send('Took too long.')
+                ctx.bot.scheduler.delete_later(10, msg)
+
+            # Not in a finally block, as being cancelled here means the book
+            # has been closed, and must not start listening again.
+            await book._send_loop()
 
         @Button('\N{BLACK RIGHT-POINTING TRIANGLE}', False)
         async def next_page(book: Book, __: Page):
@@ -460,8 +745,8 @@ class Book:
 
         @Button('\N{PUT LITTER IN ITS PLACE SYMBOL}')
         async def close_and_delete(b: Book, __: Page):
-            await b.response_message.delete()
-            await b.context_invoked_from.message.delete()
+            await b.context_invoked_from.bot.deleter.delete(
+                b.response_message, b.context_invoked_from.message)
 
         return [
             first_page,
@@ -476,25 +761,30 @@ class Book:
 
 class PaginatedBook(Book):
     """
-    Mixes in commands.Paginator functionality with the Book "engine" to make
+    Mixes in paginator functionality with the Book "engine" to make
     for auto-paginating strings without having to have a brain.
 
-    This works by containing a paginator inside the class definition.
+    This works by containing a ``neko.StreamingPaginator`` inside the class
+    definition.
 
     The outer book wrapper can still have pages added to it as normal, however,
     the lines and paragraphs added will be appended as pages to the end of the
     book when it is sent.
 
+    Text can also be streamed in with ``stream``, in which case pages are
+    shown as soon as they fill up rather than once all of the text is read.
+
     :param prefix: the prefix to each page. Defaults to nothing.
     :param suffix: the suffix to each page. Defaults to nothing.
     :param max_size: the max character count to allow per page. Discord limits
             this anyway (read the API documentation for embed limits). This
-            defaults to 1900
+            defaults to 1990
     :param max_lines: the max number of lines to allow per page to limit the
             height of embeds. This is not set by default.
     :param ctx: the command context. A required ``keyword`` argument.
     :param title: the title to add to the top of paginated pages. This does not
             affect embeds.
+    :param spill_threshold: see ``Book``.
     """
 
     def __init__(self,
@@ -504,71 +794,30 @@ class PaginatedBook(Book):
                  max_size=1990,
                  max_lines=None,
                  ctx: commands.Context,
-                 title: str):
+                 title: str,
+                 spill_threshold: int = None):
 
         if max_lines is not None and max_lines < 1:
             raise ValueError('Cannot set maxlines to be less than 1.')
 
-        super().__init__(ctx)
-        self.paginator = commands.Paginator(prefix, suffix, max_size)
+        super().__init__(ctx, spill_threshold=spill_threshold)
+        self.paginator = strings.StreamingPaginator(
+            prefix, suffix, max_size, max_lines)
         self.title = title
         self.max_lines = max_lines
-        self.__pag_curr_lines = 0
+        self.__titled = False
 
     def add_line(self, content='', follow_with_empty=False):
         """
-        Adds a line to the current page.
+        Adds a line to the current page. If the line is too long, it is split
+        on the nearest space that fits.
         :param content: the content of the line.
         :param follow_with_empty: defaults to false. If true, a blank line
                 proceeds the current line.
         """
-
-        # If the line cannot be fit in a full page, then don't immediately
-        # give up. Instead, try to backtrack from the max page length
-        # to the nearest space at the rear. If we still cannot resolve this,
-        # then raise an error.
-        max_len = (self.paginator.max_size
-                   - len(self.paginator.prefix) - len(self.paginator.suffix))
-
-        while len(content) >= max_len:
-            index = max_len - 1
-            while index >= 0 and not content[index].isspace():
-                index -= 1
-
-            # If index = -1, then we have failed to find a space
-            if index == -1:
-                raise RuntimeError(f'Line exceeds max line size of {max_len} '
-                                   'but I could not find any spaces, so I am '
-                                   'giving up.')
-
-            line = content[:index + 1]
-            content = content[index + 1:]
-            self.__add_line(line, empty=follow_with_empty)
-
-        self.__add_line(content)
-
-    def __add_line(self, content, empty=False):
-        """
-        Takes a string to add, and counts the lines. If we go over max_lines
-        if that is set, then we page-break at the limit repeatedly.
-        :param content: the content to add.
-        :param empty: true if to add an empty line after.
-        """
-        if self.max_lines is not None:
-            content = content.split('\n')
-
-            for line in content:
-                if self.max_lines <= self.__pag_curr_lines:
-                    self.paginator.close_page()
-                    self.__pag_curr_lines = 0
-                self.paginator.add_line(line)
-                self.__pag_curr_lines += 1
-
-            if empty:
-                self.paginator.add_line(empty=True)
-                self.__pag_curr_lines += 1
-        else:
-            self.paginator.add_line(content, empty=empty)
+        self.paginator.add_text(content)
+        if follow_with_empty:
+            self.paginator.add_line()
 
     def add_lines(self, content, follow_with_empty=True):
         """
@@ -580,22 +829,115 @@ class PaginatedBook(Book):
         if not hasattr(content, '__iter__'):
             raise TypeError('Must be iterable or string (using \\n to delimit)')
         elif isinstance(content, str):
-            content = content.split('\n')
+            self.paginator.add_text(content)
+        else:
+            for line in content:
+                self.paginator.add_text(line)
 
-        for line in content:
-            self.add_line(line)
         if follow_with_empty:
-            self.add_line()
+            self.paginator.add_line()
+
+    def stream(self,
+               source: typing.Union[typing.Iterable[str],
+                                    typing.AsyncIterable[str]],
+               estimated_total: int = None):
+        """
+        Reads text lazily from the given iterable or async iterable once the
+        book is sent. Each page is shown as soon as it fills up. Any lines
+        already added come first.
+
+        :param source: strings to add, each of which may span several lines.
+        :param estimated_total: an estimate of the number of pages, if known.
+        """
+        self.set_source(self.__stream_pages(source), estimated_total)
+
+    async def __stream_pages(self, source):
+        async for text in self.paginator.afeed(source):
+            yield self._make_page(text)
+
+    def _make_page(self, text: str) -> Page:
+        """Makes a page of the given text, titling it if it is the first."""
+        if self.__titled:
+            return Page(description=text)
+        else:
+            self.__titled = True
+            return Page(title=self.title, description=text)
 
     async def send(self):
         """
         Adds each page from the string paginator to the book as an embed.
         """
-        for index, page in enumerate(self.paginator.pages):
-            if index == 0:
-                book_page = Page(title=self.title, description=page)
-            else:
-                book_page = Page(description=page)
-            self.append(book_page)
+        for page in self.paginator.take_all():
+            self.append(self._make_page(page))
 
         await super().send()
+
+
+class BookManager:
+    """
+    Bot-wide registry of books that are still listening for reactions.
+
+    Each open book holds its context, every page, and a pending
+    ``wait_for`` until it times out. To stop these piling up when someone
+    spams commands, only so many books may be open per user and per channel
+    at once. Opening another closes the oldest one that is over the cap.
+
+    :param max_per_user: most books a single user may have open.
+    :param max_per_channel: most books that may be open in a single channel.
+    """
+    def __init__(self, max_per_user: int = 3, max_per_channel: int = 5):
+        if max_per_user < 1 or max_per_channel < 1:
+            raise ValueError('Caps must be at least 1.')
+
+        self.max_per_user = max_per_user
+        self.max_per_channel = max_per_channel
+        self.evictions = 0
+
+        # Oldest first.
+        self._books: typing.Dict[int, Book] = collections.OrderedDict()
+        self._by_user = collections.defaultdict(collections.OrderedDict)
+        self._by_channel = collections.defaultdict(collections.OrderedDict)
+
+    def __len__(self):
+        return len(self._books)
+
+    def __iter__(self) -> typing.Iterator[Book]:
+        """Yields each open book, oldest first."""
+        yield from list(self._books.values())
+
+    @staticmethod
+    def _keys(book: Book):
+        ctx = book.context_invoked_from
+        return ctx.author.id, ctx.channel.id
+
+    def register(self, book: Book):
+        """
+        Registers the book as open, closing the oldest books for the same
+        user or channel if either would go over its cap.
+        """
+        user_id, channel_id = self._keys(book)
+
+        for index, cap in ((self._by_user[user_id], self.max_per_user),
+                           (self._by_channel[channel_id],
+                            self.max_per_channel)):
+            while len(index) >= cap:
+                _, oldest = index.popitem(last=False)
+                self.unregister(oldest)
+                oldest.close()
+                self.evictions += 1
+
+        self._books[id(book)] = book
+        self._by_user[user_id][id(book)] = book
+        self._by_channel[channel_id][id(book)] = book
+
+    def unregister(self, book: Book):
+        """Forgets the given book. This is safe to call more than once."""
+        if self._books.pop(id(book), None) is None:
+            return
+
+        user_id, channel_id = self._keys(book)
+        for mapping, key in ((self._by_user, user_id),
+                             (self._by_channel, channel_id)):
+            mapping[key].pop(id(book), None)
+            if not mapping[key]:
+                del mapping[key]
@@ -0,0 +1,141 @@
+"""
+Aggregates message deletions into bulk deletes.
+
+Cleaning up after a command usually means deleting both our response and the
+message that invoked us, and each of those is a request of its own. When
+things are busy, these pile up against the rate limit. The ``BulkDeleter``
+holds deletes for each channel for a short window, and then deletes them all
+in one request where Discord allows it.
+"""
+import asyncio
+import datetime
+import typing
+
+import discord
+import discord.utils
+
+import neko.other.log as log
+
+__all__ = ['BulkDeleter']
+
+
+# Discord will not bulk delete anything older than this. We allow a bit of
+# leeway in case our clock or the queue is running behind.
+_bulk_max_age = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+
+# Most messages one bulk delete request can take.
+_bulk_max_count = 100
+
+
+class BulkDeleter(log.Loggable):
+    """
+    Collects messages to delete per channel, and deletes them together.
+
+    If at least two of the messages collected in a channel within the window
+    can be bulk deleted, they are. Anything else is deleted one at a time.
+    Messages can only be bulk deleted if they are in a guild channel where we
+    have permission to manage messages, and are under two weeks old.
+
+    :param window: how many seconds to collect deletes in a channel for before
+            performing them.
+    """
+
+    def __init__(self, window: float = 0.5, loop=None):
+        self.window = window
+        self._loop = loop
+        # Channel ID -> (channel, list of (message, future))
+        self._pending: typing.Dict[int, tuple] = {}
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+
+    def __len__(self):
+        """Counts the messages waiting to be deleted."""
+        return sum(len(pending) for _, pending in self._pending.values())
+
+    def queue(self, *messages: discord.Message) -> asyncio.Future:
+        """
+        Queues the messages to be deleted.
+
+        :return: a future that completes once the messages are deleted, or
+                we have given up trying. This never raises.
+        """
+        loop = self._loop or asyncio.get_event_loop()
+        futures = []
+
+        for message in messages:
+            if message is None:
+                continue
+
+            channel = message.channel
+            if channel.id not in self._pending:
+                self._pending[channel.id] = channel, []
+                loop.call_later(self.window, self._flush, channel.id)
+
+            future = loop.create_future()
+            self._pending[channel.id][1].append((message, future))
+            futures.append(future)
+
+        return asyncio.gather(*futures)
+
+    async def delete(self, *messages: discord.Message):
+        """Queues the messages to be deleted, and waits until they are."""
+        await self.queue(*messages)
+
+    def _flush(self, channel_id: int):
+        channel, pending = self._pending.pop(channel_id)
+        asyncio.ensure_future(self._delete_pending(channel, pending))
+
+    @staticmethod
+    def _can_bulk_delete(channel) -> bool:
+        guild = getattr(channel, 'guild', None)
+        return (
+            guild is not None
+            and channel.permissions_for(guild.me).manage_messages)
+
+    async def _delete_pending(self, channel, pending):
+        # The same message may have been queued more than once.
+        messages = list({m.id: m for m, _ in pending}.values())
+
+        try:
+            if self._can_bulk_delete(channel):
+                oldest = datetime.datetime.utcnow() - _bulk_max_age
+                bulk = [m for m in messages
+                        if discord.utils.snowflake_time(m.id) > oldest]
+            else:
+                bulk = []
+
+            if len(bulk) < 2:
+                bulk = []
+
+            bulk_ids = {m.id for m in bulk}
+            singles = [m for m in messages if m.id not in bulk_ids]
+
+            for i in range(0, len(bulk), _bulk_max_count):
+                chunk = bulk[i:i + _bulk_max_count]
+                if len(chunk) == 1:
+                    singles.extend(chunk)
+                    continue
+
+                try:
+                    await channel.delete_messages(chunk)
+                    self.bulk_deleted += len(chunk)
+                except discord.HTTPException as ex:
+                    # Most likely one of them has already gone. Try each on
+                    # its own instead.
+                    self.logger.debug(f'Bulk delete failed: {ex}')
+                    singles.extend(chunk)
+
+            for message in singles:
+                try:
+                    await message.delete()
+                    self.single_deleted += 1
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as ex:
+                    self.logger.warning(
+                        f'Could not delete message {message.id} in '
+                        f'{channel}: {ex}')
+        finally:
+            for _, future in pending:
+                if not future.done():
+                    future.set_result(None)
@@ -1,6 +1,7 @@
 """
 Implementation of discord.ext.commands.Bot.
 """
+import asyncio
 import collections
 import concurrent.futures
 import copy
@@ -11,6 +12,7 @@ import logging
 import os
 import signal
 import sys
+import time
 import traceback
 import types
 
@@ -20,7 +22,17 @@ import discord
 import discord.ext.commands as commands
 import neko
 import neko.common as common
+import neko.blockingio as blockingio
+import neko.errorlog as errorlog
+import neko.metrics as metrics
+import neko.book as book
+import neko.bulkdelete as bulkdelete
 import neko.io as io
+import neko.reactions as reactions
+import neko.router as router
+import neko.scheduler as scheduler
+import neko.stats as stats
+import neko.watchdog as watchdog
 import neko.other.log as log
 import neko.other.asyncpgconn as asyncpgconn
 
@@ -143,11 +155,69 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
                 has yet to start.
         - ``last_error`` - LastError - the last error that occurred. This can
                 be set by anything in the bot, and is useful for diagnostics.
+                Setting this also records the error in ``errors``.
+        - ``errors`` - ErrorLog - ring buffer of recent errors, grouped by
+                fingerprint. The size is set by ``error_log_size`` in the
+                config.
+        - ``reaction_pipeline`` - ReactionPipeline - adds and removes
+                reactions on messages, pacing requests per channel to stay
+                within the rate limit. Use this for any reaction buttons.
+        - ``book_manager`` - BookManager - registry of books that are still
+                open. This caps how many may be open per user and per
+                channel, set by ``max_books_per_user`` and
+                ``max_books_per_channel`` in the config.
+        - ``deleter`` - BulkDeleter - collects message deletes per channel
+                for a moment, and bulk deletes them where possible. Use
+                ``await bot.deleter.delete(*messages)`` for cleaning up.
+        - ``scheduler`` - Scheduler - timer wheel for deferred work, such as
+                deleting, editing or clearing reactions on a message later.
+                Use this rather than sleeping in a coroutine.
+        - ``reaction_router`` - EventRouter - routes ``reaction_add`` events
+                by message ID. Use ``reaction_router.wait_for(message_id)``
+                instead of ``wait_for('reaction_add')`` when waiting on a
+                reaction to a specific message.
+        - ``message_router`` - EventRouter - routes ``message`` events by
+                channel ID in the same way.
+        - ``command_stats`` - CommandStatsTable - invocation and error
+                counts, and latency histograms, for each command.
+        - ``listener_stats`` - ListenerStatsTable - call and error counts,
+                and histograms of time spent on the event loop, for each
+                event listener. These are keyed by the event name and the
+                listener's qualified name.
+        - ``metrics`` - MetricsServer - serves ``/metrics`` for Prometheus
+                and ``/healthz`` over HTTP, or None if ``metrics_port`` is
+                not set in the config. This listens on ``metrics_host``,
+                which defaults to the loopback interface.
+        - ``watchdog`` - LoopWatchdog - thread measuring how long the event
+                loop takes to respond. When this passes ``loop_lag_threshold``
+                seconds in the config, the stack of whatever is blocking the
+                loop is logged and kept in ``watchdog.stalls``.
+        - ``blocking_io`` - BlockingCallDetector - records blocking calls,
+                such as opening files, made on the event loop thread, and
+                which cog and command made them. This is off unless
+                ``detect_blocking_io`` is true in the config, or it is
+                switched on with ``blocking_io.enable()``. What it finds
+                by the time we are first ready is logged.
+        - ``thread_pool_backlog`` - int - how many jobs are waiting for a
+                thread in the pool ``do_job_in_pool`` uses.
+        - ``book_spill_threshold`` - int - books with more pages than this
+                are sent as a single file attachment instead. Set by
+                ``book_spill_threshold`` in the config. This defaults to 0,
+                which disables it.
 
     **New Methods:**
         - ``async def do_job_in_pool(func, *args, **kwargs)`` - runs func
                 in a dedicated thread pool executor without blocking the
                 current coroutine event loop.
+        - ``def dispatch(event, *args, **kwargs)`` - routes the event to
+                any waiters on ``reaction_router`` or ``message_router``,
+                then dispatches it as normal. Each listener it runs is timed
+                and recorded in ``listener_stats``.
+        - ``def record_error(type, value, traceback, *, command, guild)`` -
+                records the error in ``errors`` and sets ``last_error``,
+                returning the ErrorEntry.
+        - ``async def get_context(message, *, cls)`` - defaults to making a
+                NekoContext, which times how long commands spend sending.
         - ``def get_token(name)`` - attempts to get the given token from the
                 tokens.json file. This file is read once and once only, and that
                 is during the ``NekoBot.__init__ method``. All members are
@@ -213,6 +283,41 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
 
         self.__extra_tokens = Tokens()
         self.__last_error = _LastErrorDated(None, None, None)
+        self.errors = errorlog.ErrorLog(config.get('error_log_size', 64))
+        self.command_stats = stats.CommandStatsTable()
+        self.listener_stats = stats.ListenerStatsTable()
+        self.reaction_pipeline = reactions.ReactionPipeline()
+        self.book_manager = book.BookManager(
+            max_per_user=config.get('max_books_per_user', 3),
+            max_per_channel=config.get('max_books_per_channel', 5))
+        self.book_spill_threshold = config.get('book_spill_threshold', 0)
+
+        self.watchdog = watchdog.LoopWatchdog(
+            self.loop, threshold=config.get('loop_lag_threshold', 0.5))
+
+        self.blocking_io = blockingio.BlockingCallDetector()
+        self.__detect_blocking_io = config.get('detect_blocking_io', False)
+
+        metrics_port = config.get('metrics_port')
+        if metrics_port is None:
+            self.metrics = None
+        else:
+            self.metrics = metrics.MetricsServer(
+                self,
+                port=metrics_port,
+                host=config.get('metrics_host', '127.0.0.1'))
+
+        self.deleter = bulkdelete.BulkDeleter(loop=self.loop)
+        self.scheduler = scheduler.Scheduler(
+            loop=self.loop, delete=self.deleter.delete)
+        self.reaction_router = router.EventRouter(
+            lambda r, _: r.message.id, self.scheduler)
+        self.message_router = router.EventRouter(
+            lambda m: m.channel.id, self.scheduler)
+        self.__routers = {
+            'reaction_add': self.reaction_router,
+            'message': self.message_router,
+        }
 
         # Remove the injected help command.
         self.remove_command('help')
@@ -237,10 +342,17 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
         async def on_resumed():
             self.logger.info(f'Resumed at {datetime.datetime.now()}')
 
+        startup_summary_logged = False
+
         @self.listen()
         async def on_ready():
+            nonlocal startup_summary_logged
             self.logger.info(f'Ready at {datetime.datetime.now()}')
 
+            if self.blocking_io.enabled and not startup_summary_logged:
+                startup_summary_logged = True
+                self.logger.warning(self.blocking_io.summary())
+
     @property
     def invite_url(self) -> str:
         """Gets the URL to invite the bot to a guild."""
@@ -256,8 +368,27 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
 
     @last_error.setter
     def last_error(self, value: (type, BaseException, types.TracebackType)):
-        """Injects timestamp."""
-        self.__last_error = _LastErrorDated(*value)
+        """Injects timestamp, and records the error."""
+        self.record_error(*value)
+
+    def record_error(self,
+                     exc_type: type,
+                     value: BaseException,
+                     tb: types.TracebackType,
+                     *,
+                     command: str = None,
+                     guild=None) -> errorlog.ErrorEntry:
+        """
+        Records the error in the error log, and sets it as the last error.
+        This is cheap enough to call for every error, even in an incident.
+
+        :param command: the qualified name of the command that failed.
+        :param guild: the guild the error happened in.
+        :return: the error log entry for the error's fingerprint.
+        """
+        self.__last_error = _LastErrorDated(exc_type, value, tb)
+        return self.errors.record(
+            exc_type, value, tb, command=command, guild=guild)
 
     @property
     def http_pool(self) -> aiohttp.ClientSession:
@@ -280,6 +411,12 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
         """
         return self.__postgres_pool
 
+    @property
+    def thread_pool_backlog(self) -> int:
+        """Counts the jobs waiting for a thread in the pool."""
+        # noinspection PyProtectedMember
+        return self.__thread_pool_executor._work_queue.qsize()
+
     @property
     def up_time(self) -> datetime.timedelta:
         """Gets the bot's up-time"""
@@ -309,7 +446,21 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
         # further complications. Fixme.
 
         # The issue is, we have to
+        self.watchdog.start()
+        if self.__detect_blocking_io:
+            try:
+                self.blocking_io.enable()
+            except RuntimeError as ex:
+                self.logger.warning(ex)
+
         await self.do_job_in_pool(self.__load_plugins)
+
+        if self.metrics is not None:
+            try:
+                await self.metrics.start()
+            except OSError as ex:
+                self.logger.error(f'Could not serve metrics: {ex}')
+
         self.start_time = datetime.datetime.utcnow()
         await super().start(self.__token)
 
@@ -342,6 +493,10 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
             except BaseException:
                 pass
 
+        self.scheduler.close()
+        self.watchdog.stop()
+        if self.metrics is not None:
+            await self.metrics.stop()
         await self.__deinit_postgres_pool()
         await self.__deinit_postgres_pool()
         await super().logout()
@@ -387,6 +542,48 @@ class NekoBot(commands.Bot, log.Loggable, metaclass=common.InitClassHookMeta):
         else:
             super().on_command_error(ctx, error)
 
+    async def get_context(self, message, *, cls=None):
+        """Gets the invocation context, which is a NekoContext by default."""
+        return await super().get_context(message, cls=cls or neko.NekoContext)
+
+    def dispatch(self, event, *args, **kwargs):
+        """
+        Routes the event to anything waiting on it in one of our routers,
+        and then dispatches it to listeners and ``wait_for`` as normal.
+        """
+        route = self.__routers.get(event)
+        if route is not None:
+            route.dispatch(*args)
+        super().dispatch(event, *args, **kwargs)
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        """
+        Runs a single listener for an event. Both the client's own ``on_``
+        methods and listeners added with ``listen`` or by cogs are
+        scheduled by ``dispatch`` through here, so this is where we time
+        each of them and count what they raise. The time recorded is only
+        what the listener spends running on the event loop, not what it
+        spends awaiting.
+        """
+        listener = self.listener_stats[
+            f'{event_name} {getattr(coro, "__qualname__", coro)}']
+        timer = stats.StepTimer()
+        start = time.perf_counter()
+        try:
+            await timer.run(coro(*args, **kwargs))
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            listener.record(timer.busy, time.perf_counter() - start, True)
+            # on_error reads sys.exc_info(), so must run in here.
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+            return
+
+        listener.record(timer.busy, time.perf_counter() - start, False)
+
     async def do_job_in_pool(self, job, *args, **kwargs):
         """
         Executes the given function in a separate thread and waits for it
@@ -3,18 +3,24 @@ Utilities for commands. These inject various pieces of functionality into the
 existing discord.py stuff.
 """
 import abc
-import traceback
+import asyncio
+import collections
+import functools
+import time
 import typing
 
-import asyncio
 import discord
 import discord.ext.commands as commands
 
-import neko
-from neko import book, strings
+from neko import book, errorlog, strings
 from neko.other import excuses
+from neko.other import log
+
+__all__ = ['NekoCommand', 'NekoGroup', 'NekoContext', 'command', 'group',
+           'NekoCommandError']
 
-__all__ = ['NekoCommand', 'NekoGroup', 'command', 'group', 'NekoCommandError']
+
+_logger = log.get_logger(__name__)
 
 
 class CommandMixin(abc.ABC):
@@ -42,103 +48,217 @@ class CommandMixin(abc.ABC):
         fq_names.extend(self.qualified_aliases)
         return fq_names
 
+    async def _timed_invoke(self, ctx: commands.Context, invoke):
+        """
+        Awaits ``invoke(ctx)``, and records how long it took in the bot's
+        ``command_stats``, along with the time spent in each phase.
+
+        A group invokes its subcommand from within its own invocation, so
+        only the outermost invocation records anything. It is recorded
+        against the command that was ultimately invoked.
+        """
+        table = getattr(ctx.bot, 'command_stats', None)
+        if table is None or hasattr(ctx, '_neko_timings'):
+            return await invoke(ctx)
+
+        ctx._neko_timings = timings = {}
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = await invoke(ctx)
+            failed = False
+            return result
+        finally:
+            total = time.perf_counter() - start
+            command = ctx.command or self
+            table[command.qualified_name].record(timings, total, failed)
+
     @classmethod
     async def on_error(cls, cog, ctx: commands.Context, error):
-        """Handles any errors that may occur in a command."""
-        ctx.bot.last_error = (type(error), error, error.__traceback__)
+        """
+        Handles any errors that may occur in a command.
 
-        try:
-            # For specific types of error, just react.
-            reacts = {
-                commands.CheckFailure: '\N{NO ENTRY SIGN}',
-                commands.MissingRequiredArgument: '\N{THOUGHT BALLOON}',
-                commands.CommandOnCooldown: '\N{ALARM CLOCK}',
-                commands.DisabledCommand: '\N{MOBILE PHONE OFF}',
-                discord.ClientException: '\N{COLLISION SYMBOL}',
-            }
+        This only does the minimum needed to tell the user something went
+        wrong: a react, or an embed from a template cached per error class.
+        Formatting and logging the traceback is done in the background, and
+        the follow-up edit and delete are left to the bot's scheduler.
+        """
+        # Record what actually broke, not the CommandInvokeError around it.
+        cause = error.__cause__ if error.__cause__ else error
+        entry = ctx.bot.record_error(
+            type(cause), cause, cause.__traceback__,
+            command=ctx.command.qualified_name if ctx.command else None,
+            guild=ctx.guild)
 
-            reaction = neko.find(lambda e: issubclass(type(error), e), reacts)
-            reaction = reacts[reaction]
+        reaction = _reaction_for(type(error))
 
+        if reaction is not None:
+            # For specific types of error, just react.
             if not issubclass(type(error), discord.NotFound):
                 await ctx.message.add_reaction(reaction)
             else:
                 pass  # ?? You cant react to something you cant react to.
+            return
 
-        except KeyError:
-            # If we haven't specified a reaction, we instead do something
-            # meaningful.
-            error = error.__cause__ if error.__cause__ else error
-
-            if not isinstance(error, NotImplementedError):
-                if isinstance(error, Warning):
-                    title = f'\N{WARNING SIGN} {error}'
-                else:
-                    title = '\N{SQUARED SOS} Oh crap...'
+        # If we haven't specified a reaction, we instead do something
+        # meaningful.
+        error = cause
+        template = _template_for(
+            type(error), getattr(cog, 'name', str(cog)))
 
-                description = strings.capitalise(excuses.get_excuse())
-            else:
-                title = (
-                    '\N{NO PEDESTRIANS} '
-                    'Road under construction. Follow diversion.')
-
-                description = ('Seems this feature isn\'t finished! Hassle '
-                               'Espy to get on it. ')
-
-            embed = book.Page(
-                title=title,
-                description=description,
-                colour=0xffbf00 if isinstance(error, Warning) else 0xff0000
-            )
-
-            if isinstance(error, NekoCommandError):
-                pass
-            elif not isinstance(error, Warning):
-                # We only show info like the cog name, etc if we are not a
-                # neko command error. Likewise, we only dump a traceback if the
-                # latter holds.
-                error_description = strings.pascal_to_space(
-                    type(error).__name__
-                )
-
-                cog = strings.pascal_to_space(getattr(cog, 'name', str(cog)))
-                error_str = str(error).strip()
-                if error_str:
-                    error_description += f' in {cog}: {str(error)}'
-                else:
-                    error_description += f' in {cog}.'
-
-                embed.set_footer(text=error_description)
-                traceback.print_exception(
-                    type(error),
-                    error,
-                    error.__traceback__
-                )
-
-            resp = await ctx.send(embed=embed)
-            await asyncio.sleep(10)
-            if isinstance(error, NekoCommandError):
-                await resp.delete()
-                return
-            elif isinstance(error, Warning):
-                await resp.edit(content='_Warnings were generated._')
+        if isinstance(error, NotImplementedError):
+            description = template.description
+        else:
+            description = excuses.get_excuse()
+
+        embed = book.Page(
+            title=template.title or f'\N{WARNING SIGN} {error}',
+            description=description,
+            colour=template.colour)
+
+        if template.footer is not None:
+            # We only show info like the cog name, etc if we are not a
+            # neko command error. Likewise, we only dump a traceback if the
+            # latter holds.
+            error_str = str(error).strip()
+            if error_str:
+                embed.set_footer(text=f'{template.footer}: {error_str}')
             else:
-                await resp.edit(content='_**Errors** were generated._')
+                embed.set_footer(text=f'{template.footer}.')
+
+            # Read these now. Another error with the same fingerprint may
+            # update the entry before the logging task gets to run.
+            asyncio.ensure_future(_log_traceback(
+                ctx.bot, entry.fingerprint, entry.count,
+                type(cause), cause, cause.__traceback__))
+
+        resp = await ctx.send(embed=embed)
+        scheduler = ctx.bot.scheduler
+        if isinstance(error, NekoCommandError):
+            scheduler.delete_later(10, resp)
+            return
+        elif isinstance(error, Warning):
+            content = '_Warnings were generated._'
+        else:
+            content = '_**Errors** were generated._'
+
+        scheduler.edit_later(10, resp, content=content)
+        scheduler.delete_later(10 + 10 * 60, resp)
+
+
+# For specific types of error, we just react.
+_reacts = {
+    commands.CheckFailure: '\N{NO ENTRY SIGN}',
+    commands.MissingRequiredArgument: '\N{THOUGHT BALLOON}',
+    commands.CommandOnCooldown: '\N{ALARM CLOCK}',
+    commands.DisabledCommand: '\N{MOBILE PHONE OFF}',
+    discord.ClientException: '\N{COLLISION SYMBOL}',
+}
 
-            async def del_in_10():
-                await asyncio.sleep(10 * 60)
-                try:
-                    await resp.delete()
-                finally:
-                    return
 
-            asyncio.ensure_future(del_in_10)
+# The parts of an error embed that only depend on the type of the error and
+# the cog it came from. If title is None, it is the error message itself.
+# If footer is None, no footer is shown and no traceback is logged.
+_ErrorTemplate = collections.namedtuple(
+    '_ErrorTemplate', 'title description colour footer')
+
+
+@functools.lru_cache(maxsize=128)
+def _reaction_for(error_type: type) -> typing.Optional[str]:
+    """Gets the react to use for the given type of error, if there is one."""
+    for base in error_type.__mro__:
+        if base in _reacts:
+            return _reacts[base]
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _template_for(error_type: type, cog_name: str) -> _ErrorTemplate:
+    """
+    Renders the parts of the error embed for the error type and cog that do
+    not change between errors. This is cached, so an error storm from one
+    broken command does not repeat this work.
+    """
+    is_warning = issubclass(error_type, Warning)
+
+    if issubclass(error_type, NotImplementedError):
+        title = ('\N{NO PEDESTRIANS} '
+                 'Road under construction. Follow diversion.')
+        description = ('Seems this feature isn\'t finished! Hassle '
+                       'Espy to get on it. ')
+    elif is_warning:
+        title = description = None
+    else:
+        title = '\N{SQUARED SOS} Oh crap...'
+        description = None
+
+    if issubclass(error_type, NekoCommandError) or is_warning:
+        footer = None
+    else:
+        error_description = strings.pascal_to_space(error_type.__name__)
+        cog = strings.pascal_to_space(cog_name)
+        footer = f'{error_description} in {cog}'
+
+    return _ErrorTemplate(
+        title, description, 0xffbf00 if is_warning else 0xff0000, footer)
+
+
+async def _log_traceback(bot, fingerprint, count, exc_type, value, tb):
+    """
+    Logs the traceback of an error the first time its fingerprint is seen.
+    This is formatted in the thread pool, so that reading the source lines
+    does not block the event loop. Repeats of the same error are only
+    logged as a single line, so that an error storm does not flood the log.
+
+    :param count: how many times the fingerprint had been seen when the
+            error happened.
+    """
+    if count == 1:
+        text = await bot.do_job_in_pool(
+            errorlog.format_error, exc_type, value, tb)
+        _logger.error(f'New error {fingerprint}:\n{text}')
+    else:
+        _logger.error(f'Error {fingerprint} seen {count} times: '
+                      f'{exc_type.__name__}: {value}')
+
+
+async def _timed_phase(ctx: commands.Context, phase: str, coro):
+    """
+    Awaits the coroutine, adding the time it took to the given phase of the
+    command being invoked, if we are timing one.
+    """
+    timings = getattr(ctx, '_neko_timings', None)
+    if timings is None:
+        return await coro
+
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[phase] = (
+            timings.get(phase, 0.0) + time.perf_counter() - start)
+
+
+class NekoContext(commands.Context):
+    """
+    Context that times how long sending takes while a command is being
+    invoked.
+    """
+    async def send(self, *args, **kwargs):
+        return await _timed_phase(self, 'send', super().send(*args, **kwargs))
 
 
 class NekoCommand(commands.Command, CommandMixin):
     """
     Implementation of a command.
     """
+    async def invoke(self, ctx):
+        return await self._timed_invoke(ctx, super().invoke)
+
+    async def _parse_arguments(self, ctx):
+        return await _timed_phase(
+            ctx, 'conversion', super()._parse_arguments(ctx))
+
     async def can_run(self, ctx):
         """
         Determine whether the command is runnable by the given context.
@@ -150,7 +270,7 @@ class NekoCommand(commands.Command, CommandMixin):
         """
         try:
             # noinspection PyUnresolvedReferences
-            return await super().can_run(ctx)
+            return await _timed_phase(ctx, 'checks', super().can_run(ctx))
         except commands.CommandError:
             return False
 
@@ -168,6 +288,13 @@ class NekoGroup(commands.Group, CommandMixin, commands.GroupMixin):
         kwargs.setdefault('cls', NekoGroup)
         return super().command(**kwargs)
 
+    async def invoke(self, ctx):
+        return await self._timed_invoke(ctx, super().invoke)
+
+    async def _parse_arguments(self, ctx):
+        return await _timed_phase(
+            ctx, 'conversion', super()._parse_arguments(ctx))
+
     async def can_run(self, ctx):
         """
         Determine whether the command is runnable by the given context.
@@ -179,7 +306,7 @@ class NekoGroup(commands.Group, CommandMixin, commands.GroupMixin):
         """
         try:
             # noinspection PyUnresolvedReferences
-            return await super().can_run(ctx)
+            return await _timed_phase(ctx, 'checks', super().can_run(ctx))
         except commands.CommandError:
             return False
 
@@ -0,0 +1,142 @@
+"""
+A bounded log of the errors the bot has hit, grouped by where they came from.
+
+Errors are fingerprinted by their type and the frames in their traceback, so
+the same failure happening a thousand times in an incident is one entry with
+a count, rather than a thousand tracebacks. Recording an error only walks the
+traceback; nothing is formatted until someone asks to see it.
+"""
+import collections
+import datetime
+import hashlib
+import traceback
+import types
+import typing
+
+__all__ = ['ErrorLog', 'ErrorEntry', 'format_error']
+
+
+def format_error(exc_type: type,
+                 value: BaseException,
+                 tb: types.TracebackType) -> str:
+    """
+    Formats the traceback of an error. This reads source files, so consider
+    running it in the thread pool.
+    """
+    return ''.join(traceback.format_exception(exc_type, value, tb))
+
+
+class ErrorEntry:
+    """
+    One fingerprint in the ErrorLog. This holds the most recent occurrence
+    of the error, along with how many times, when, and where it has happened.
+    """
+    __slots__ = ('fingerprint', 'type', 'value', 'traceback', 'count',
+                 'first_seen', 'last_seen', 'command', 'guild')
+
+    def __init__(self, fingerprint: str, exc_type: type):
+        self.fingerprint = fingerprint
+        self.type = exc_type
+        self.value = None
+        self.traceback = None
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.command = None
+        self.guild = None
+
+
+class ErrorLog:
+    """
+    Ring buffer of the most recently seen error fingerprints.
+
+    :param max_entries: how many fingerprints to remember. Once full, the
+            fingerprint seen least recently is forgotten.
+    """
+    def __init__(self, max_entries: int = 64):
+        if max_entries < 1:
+            raise ValueError('Must be able to hold at least one entry.')
+
+        self.max_entries = max_entries
+        # Least recently seen first.
+        self._entries: typing.Dict[str, ErrorEntry] = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self) -> typing.Iterator[ErrorEntry]:
+        """Yields each entry, most recently seen first."""
+        yield from reversed(list(self._entries.values()))
+
+    @property
+    def last(self) -> typing.Optional[ErrorEntry]:
+        """Gets the entry seen most recently, or None if there is none."""
+        if not self._entries:
+            return None
+        return next(iter(self))
+
+    @staticmethod
+    def fingerprint(exc_type: type, tb: types.TracebackType) -> str:
+        """
+        Fingerprints an error by its type and the file, function and line of
+        each frame in its traceback. This is a digest rather than ``hash``,
+        so the same error keeps its fingerprint across restarts.
+        """
+        frames = []
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append(f'{code.co_filename}:{tb.tb_lineno}:{code.co_name}')
+            tb = tb.tb_next
+
+        key = '\n'.join(
+            [f'{exc_type.__module__}.{exc_type.__qualname__}', *frames])
+        return hashlib.blake2b(key.encode(), digest_size=4).hexdigest()
+
+    def record(self,
+               exc_type: type,
+               value: BaseException,
+               tb: types.TracebackType,
+               *,
+               command: str = None,
+               guild=None) -> ErrorEntry:
+        """
+        Records an occurrence of the given error.
+
+        :param command: the qualified name of the command it happened in, if
+                any.
+        :param guild: the guild it happened in, if any.
+        :return: the entry for the error's fingerprint. If ``count`` is 1, we
+                have not seen this one before.
+        """
+        fingerprint = self.fingerprint(exc_type, tb)
+        entry = self._entries.get(fingerprint)
+
+        if entry is None:
+            entry = ErrorEntry(fingerprint, exc_type)
+            self._entries[fingerprint] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(fingerprint)
+
+        now = datetime.datetime.now()
+        entry.value, entry.traceback = value, tb
+        entry.count += 1
+        entry.first_seen = entry.first_seen or now
+        entry.last_seen = now
+        entry.command, entry.guild = command, guild
+        return entry
+
+    def top(self, count: int = None) -> typing.List[ErrorEntry]:
+        """Gets the entries that occurred most often, most often first."""
+        entries = sorted(self._entries.values(),
+                         key=lambda e: (e.count, e.last_seen),
+                         reverse=True)
+        return entries[:count] if count is not None else entries
+
+    def find(self, prefix: str) -> typing.Optional[ErrorEntry]:
+        """Finds the entry whose fingerprint starts with the given prefix."""
+        for fingerprint, entry in self._entries.items():
+            if fingerprint.startswith(prefix.lower()):
+                return entry
+        return None
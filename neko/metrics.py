@@ -0,0 +1,201 @@
+"""
+Serves the health of the bot process over HTTP, so it can be scraped.
+
+``/metrics`` gives gauges in the Prometheus text exposition format, and
+``/healthz`` says whether we are connected to the gateway and ready, with a
+503 status if not. Everything is read from objects we already hold, so a
+scrape does no I/O of its own and stays cheap even when the bot is not.
+"""
+import math
+import os
+import typing
+
+import aiohttp.web as web
+
+import neko.other.log as log
+
+__all__ = ['MetricsServer']
+
+
+class MetricsServer(log.Loggable):
+    """
+    Small aiohttp server exposing ``/metrics`` and ``/healthz`` for the bot.
+
+    :param bot: the NekoBot to report on.
+    :param port: the port to listen on.
+    :param host: the interface to listen on. This defaults to the loopback
+            interface, as nothing here is meant to be public.
+    """
+
+    def __init__(self, bot, port: int, host: str = '127.0.0.1'):
+        self.bot = bot
+        self.host = host
+        self.port = port
+
+        self._app = web.Application()
+        self._app.router.add_get('/metrics', self.metrics)
+        self._app.router.add_get('/healthz', self.healthz)
+        self._handler = None
+        self._server = None
+
+        # Held open so reading the RSS is a pread rather than an open/read
+        # on the event loop every scrape.
+        self._statm_fd = None
+
+    async def start(self):
+        """Starts listening."""
+        loop = self.bot.loop
+
+        try:
+            self._statm_fd = os.open('/proc/self/statm', os.O_RDONLY)
+        except (OSError, AttributeError):
+            self._statm_fd = None
+
+        self._handler = self._app.make_handler(loop=loop, access_log=None)
+        self._server = await loop.create_server(
+            self._handler, self.host, self.port)
+        self.logger.info(
+            f'Serving metrics on http://{self.host}:{self.port}/metrics')
+
+    async def stop(self):
+        """Stops listening and releases anything we hold open."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            await self._app.shutdown()
+            await self._handler.shutdown(1.0)
+            await self._app.cleanup()
+            self._server = self._handler = None
+
+        if self._statm_fd is not None:
+            os.close(self._statm_fd)
+            self._statm_fd = None
+
+    async def healthz(self, _request):
+        """200 if we are connected and ready, otherwise 503."""
+        bot = self.bot
+        connected = not bot.is_closed() and bot.ws is not None
+        ready = connected and bot.is_ready()
+        return web.json_response(
+            {
+                'connected': connected,
+                'ready': ready,
+                'latency': _finite_or_none(bot.latency),
+            },
+            status=200 if ready else 503)
+
+    async def metrics(self, _request):
+        lines = []
+        for name, help_text, samples in self.collect():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {value!r}')
+        lines.append('')
+
+        return web.Response(
+            text='\n'.join(lines),
+            content_type='text/plain',
+            headers={'X-Content-Type-Options': 'nosniff'})
+
+    def collect(self) -> typing.Iterator[tuple]:
+        """
+        Yields each metric as a tuple of its name, help text, and a list of
+        (labels, value) samples. Metrics we cannot measure at the moment,
+        such as the database pool before it exists, are left out.
+        """
+        bot = self.bot
+
+        lag = bot.watchdog.lag.snapshot()
+        yield ('neko_event_loop_last_lag_seconds',
+               'How long the event loop last took to answer the watchdog.',
+               [({}, bot.watchdog.last_lag)])
+        yield ('neko_event_loop_lag_seconds',
+               'How long the event loop took to answer the watchdog over '
+               'the last few minutes.',
+               [({'quantile': '0.5'}, lag.quantile(0.5)),
+                ({'quantile': '0.99'}, lag.quantile(0.99)),
+                ({'quantile': '1'}, lag.worst)])
+
+        yield ('neko_thread_pool_queue_depth',
+               'Jobs waiting for a thread in the bot thread pool.',
+               [({}, bot.thread_pool_backlog)])
+
+        pool = bot.postgres_pool
+        if pool is not None:
+            yield ('neko_postgres_pool_connections',
+                   'Connections in the postgres pool, by state.',
+                   _postgres_pool_samples(pool))
+
+        session = bot.http_pool
+        connector = getattr(session, 'connector', None)
+        if connector is not None:
+            yield ('neko_http_connector_connections',
+                   'Connections held by the aiohttp connector, by state.',
+                   _connector_samples(connector))
+
+        latency = _finite_or_none(bot.latency)
+        if latency is not None:
+            yield ('neko_gateway_latency_seconds',
+                   'Time between a gateway heartbeat and its ack.',
+                   [({}, latency)])
+
+        yield ('neko_guilds', 'Guilds we are in.', [({}, len(bot.guilds))])
+        yield ('neko_users', 'Users we can see.', [({}, len(bot.users))])
+
+        rss = self._rss_bytes()
+        if rss is not None:
+            yield ('process_resident_memory_bytes',
+                   'Resident set size of the bot process.',
+                   [({}, rss)])
+
+    def _rss_bytes(self) -> typing.Optional[int]:
+        if self._statm_fd is None:
+            return None
+        try:
+            statm = os.pread(self._statm_fd, 128, 0).split()
+            return int(statm[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, IndexError, ValueError):
+            return None
+
+
+def _finite_or_none(value: float) -> typing.Optional[float]:
+    return value if value is not None and math.isfinite(value) else None
+
+
+def _format_labels(labels: typing.Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{k}="{v}"' for k, v in labels.items())
+    return '{' + pairs + '}'
+
+
+def _postgres_pool_samples(pool) -> list:
+    # noinspection PyProtectedMember
+    holders = getattr(pool, '_holders', ())
+    # noinspection PyProtectedMember
+    queue = getattr(pool, '_queue', None)
+
+    size = sum(1 for h in holders if getattr(h, '_con', None) is not None)
+    idle = queue.qsize() if queue is not None else 0
+    # Anything blocked in pool.acquire() is parked on the queue.
+    # noinspection PyProtectedMember
+    waiters = len(getattr(queue, '_getters', ()))
+
+    return [({'state': 'open'}, size),
+            ({'state': 'idle'}, min(idle, size)),
+            ({'state': 'max'}, len(holders)),
+            ({'state': 'waiting'}, waiters)]
+
+
+def _connector_samples(connector) -> list:
+    # noinspection PyProtectedMember
+    acquired = len(getattr(connector, '_acquired', ()))
+    # noinspection PyProtectedMember
+    idle = sum(len(c) for c in getattr(connector, '_conns', {}).values())
+    samples = [({'state': 'in_use'}, acquired), ({'state': 'idle'}, idle)]
+
+    limit = getattr(connector, 'limit', None)
+    if limit:
+        samples.append(({'state': 'max'}, limit))
+    return samples
@@ -0,0 +1,175 @@
+"""
+Reaction bookkeeping for messages we drive with buttons.
+
+Discord rate limits reaction changes per channel, and discord.py only finds
+out that it has been limited once it receives a 429. Books and other reaction
+UIs used to clear every reaction and re-add each button one awaited request
+at a time, which meant several round-trips before anyone could use them.
+
+The ``ReactionPipeline`` instead remembers which reactions we have placed on
+each message, works out the smallest set of changes needed to get to the
+buttons we want, and paces the requests it makes in each channel so that we
+stay inside the bucket rather than bouncing off of it.
+"""
+import asyncio
+import collections
+import time
+import typing
+
+import discord
+
+import neko.other.log as log
+
+__all__ = ['ReactionPipeline']
+
+
+class _Bucket:
+    """Serialises reaction requests within a single channel."""
+    __slots__ = ('lock', 'last', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.last = 0.0
+        self.users = 0
+
+
+def _me(message: discord.Message):
+    """Gets our own member or user in the channel the message is in."""
+    return message.guild.me if message.guild else message.channel.me
+
+
+class ReactionPipeline(log.Loggable):
+    """
+    Adds and removes reactions, pacing the requests in each channel.
+
+    :param interval: the minimum number of seconds between two reaction
+            requests in the same channel. Discord allows one every quarter
+            of a second.
+    :param max_tracked: how many messages to remember our reactions on.
+    """
+
+    def __init__(self, interval: float = 0.25, max_tracked: int = 1024):
+        self.interval = interval
+        self.max_tracked = max_tracked
+        self._buckets: typing.Dict[int, _Bucket] = {}
+        # Message ID -> emojis we have placed, in the order they display in.
+        self._placed: typing.MutableMapping[int, typing.List[str]] = (
+            collections.OrderedDict())
+
+    def placed_on(self, message: discord.Message) -> typing.List[str]:
+        """
+        Gets the emojis we have placed on the given message, in order. If we
+        have not been tracking the message, this is worked out from the
+        reactions discord.py has cached on it.
+        """
+        try:
+            return list(self._placed[message.id])
+        except KeyError:
+            return [str(r.emoji) for r in message.reactions if r.me]
+
+    def __remember(self, message, emojis):
+        self._placed[message.id] = emojis
+        self._placed.move_to_end(message.id)
+        while len(self._placed) > self.max_tracked:
+            self._placed.popitem(last=False)
+
+    async def __paced(self, channel_id, coro_factory):
+        """
+        Waits for our turn in the channel's bucket, then awaits the
+        coroutine that coro_factory produces.
+        """
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = _Bucket()
+
+        bucket.users += 1
+        try:
+            async with bucket.lock:
+                delay = bucket.last + self.interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    return await coro_factory()
+                finally:
+                    bucket.last = time.monotonic()
+        finally:
+            bucket.users -= 1
+            if not bucket.users:
+                # Keep the bucket until the interval has passed, otherwise
+                # the next request would not know to wait.
+                asyncio.get_event_loop().call_later(
+                    self.interval, self.__prune, channel_id)
+
+    def __prune(self, channel_id):
+        bucket = self._buckets.get(channel_id)
+        if bucket is not None and not bucket.users:
+            del self._buckets[channel_id]
+
+    async def add(self, message: discord.Message, *emojis: str):
+        """Adds the given reactions to the message, in order."""
+        placed = self.placed_on(message)
+        for emoji in emojis:
+            await self.__paced(message.channel.id,
+                               lambda: message.add_reaction(emoji))
+            placed.append(emoji)
+            self.__remember(message, placed)
+
+    async def remove(self, message: discord.Message, emoji: str, member):
+        """
+        Removes a single reaction by the given member from the message. If
+        the member is us, then we stop tracking the reaction.
+        """
+        await self.__paced(message.channel.id,
+                           lambda: message.remove_reaction(emoji, member))
+
+        if member.id == _me(message).id:
+            placed = self.placed_on(message)
+            if emoji in placed:
+                placed.remove(emoji)
+                self.__remember(message, placed)
+
+    async def reconcile(self,
+                        message: discord.Message,
+                        wanted: typing.Iterable[str]):
+        """
+        Makes our reactions on the message match ``wanted``, in order.
+
+        Any of our reactions that already match the start of ``wanted`` are
+        kept. Anything of ours after that point is removed, as Discord
+        orders reactions by when they were first added, and then the rest
+        of ``wanted`` is added.
+        """
+        wanted = [*wanted]
+        placed = self.placed_on(message)
+
+        keep = 0
+        while (keep < len(placed) and keep < len(wanted)
+               and placed[keep] == wanted[keep]):
+            keep += 1
+
+        self.logger.debug(
+            f'Reconciling reactions on {message.id}: keeping {keep}, '
+            f'removing {len(placed) - keep}, adding {len(wanted) - keep}.')
+
+        me = _me(message)
+        for emoji in placed[keep:]:
+            await self.__paced(message.channel.id,
+                               lambda: message.remove_reaction(emoji, me))
+
+        self.__remember(message, placed[:keep])
+        await self.add(message, *wanted[keep:])
+
+    async def clear(self, message: discord.Message):
+        """
+        Clears all reactions from the message, unless we know that there
+        are none to clear.
+        """
+        if not self.placed_on(message) and not message.reactions:
+            return
+
+        await self.__paced(message.channel.id, message.clear_reactions)
+        self._placed.pop(message.id, None)
+
+    def forget(self, message: discord.Message):
+        """Stops tracking a message, for example once it is deleted."""
+        self._placed.pop(message.id, None)
@@ -0,0 +1,114 @@
+"""
+Routes gateway events to whoever is waiting on them, by key.
+
+``commands.Bot.wait_for`` keeps one flat list of listeners per event, and
+runs every check in it for every event. With a book open in every other
+channel, each reaction anywhere then costs a check per open book. An
+``EventRouter`` instead files each waiter under a key, such as the ID of
+the message it is interested in, so dispatching an event is one dict lookup
+plus the checks of whoever is waiting on that key.
+"""
+import asyncio
+import typing
+
+__all__ = ['EventRouter']
+
+
+class EventRouter:
+    """
+    Dispatches events to waiters filed under the key of the event.
+
+    :param key: takes the arguments of the event, and returns the key to
+            route it by.
+    :param scheduler: optional ``neko.Scheduler`` to hold the expiry of each
+            waiter, rather than a timer handle in the event loop.
+    """
+    __slots__ = ('_key', '_waiters', '_scheduler')
+
+    def __init__(self,
+                 key: typing.Callable[..., typing.Hashable],
+                 scheduler=None):
+        self._key = key
+        self._waiters: typing.Dict[typing.Hashable, list] = {}
+        self._scheduler = scheduler
+
+    def __len__(self):
+        """Counts the waiters currently waiting on any key."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def wait_for(self, key, *, check=None, timeout=None):
+        """
+        Waits for the next event routed to the given key for which check
+        returns True. This behaves the same as ``commands.Bot.wait_for``,
+        returning the single argument of the event, or a tuple if there
+        are several.
+
+        :param key: the key to wait on.
+        :param check: optional predicate taking the event arguments.
+        :param timeout: seconds to wait before the waiter expires and
+                ``asyncio.TimeoutError`` is raised. None waits forever.
+        """
+        future = asyncio.get_event_loop().create_future()
+        entry = (future, check)
+        self._waiters.setdefault(key, []).append(entry)
+
+        if timeout is None or self._scheduler is None:
+            expiry = None
+            waiting = asyncio.wait_for(future, timeout)
+        else:
+            expiry = self._scheduler.call_later(timeout, self.__expire, future)
+            waiting = future
+
+        try:
+            return await waiting
+        finally:
+            if expiry is not None:
+                expiry.cancel()
+            self.__discard(key, entry)
+
+    @staticmethod
+    def __expire(future):
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    def __discard(self, key, entry):
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+
+        try:
+            waiters.remove(entry)
+        except ValueError:
+            pass
+
+        if not waiters:
+            del self._waiters[key]
+
+    def dispatch(self, *args):
+        """
+        Passes the event arguments to each waiter on the event's key, and
+        resolves every waiter whose check passes, as ``wait_for`` does.
+        Waiters whose check raises are given the exception.
+        """
+        key = self._key(*args)
+        waiters = self._waiters.get(key)
+        if not waiters:
+            return
+
+        result = args[0] if len(args) == 1 else args
+
+        for entry in list(waiters):
+            future, check = entry
+            if future.done():
+                self.__discard(key, entry)
+                continue
+
+            try:
+                passed = check is None or check(*args)
+            except Exception as ex:
+                future.set_exception(ex)
+                self.__discard(key, entry)
+            else:
+                if passed:
+                    future.set_result(result)
+                    self.__discard(key, entry)
@@ -9,7 +9,7 @@ import discord.embeds as embeds
 import neko
 
 
-__all__ = ('SafeEmbed', 'FullEmbedError', 'EmptyEmbedField')
+__all__ = ('SafeEmbed', 'FrozenEmbed', 'FullEmbedError', 'EmptyEmbedField')
 
 
 EmptyEmbedField = embeds.EmptyEmbed
@@ -132,3 +132,45 @@ class SafeEmbed(embeds.Embed):
 
         return f'<SafeEmbed' + (', '.join(strings) if strings else '') + '>'
 
+
+class FrozenEmbed:
+    """
+    An embed that has been serialised into its final payload once, with
+    every limit already enforced.
+
+    This behaves enough like an embed to be passed as the ``embed`` to
+    ``send`` or ``edit``, as both just call ``to_dict``. Since the payload is
+    reused as-is, the embed must not be changed after freezing it.
+    """
+    __slots__ = ('_payload',)
+
+    def __init__(self, embed: embeds.Embed):
+        self._payload = self.__trim(embed.to_dict())
+
+    def to_dict(self) -> dict:
+        """Gets the payload. This is not a copy, so do not modify it."""
+        return self._payload
+
+    def __eq__(self, other):
+        return (isinstance(other, FrozenEmbed)
+                and self._payload == other._payload)
+
+    @staticmethod
+    def __trim(payload: dict) -> dict:
+        """Enforces the embed limits on the given payload in place."""
+        def trim(d, key, max_length):
+            if d is not None and isinstance(d.get(key), str):
+                d[key] = neko.ellipses(d[key], max_length)
+
+        trim(payload, 'title', _max_title)
+        trim(payload, 'description', _max_desc)
+        trim(payload.get('footer'), 'text', _max_footer)
+        trim(payload.get('author'), 'name', _max_auth_name)
+
+        if 'fields' in payload:
+            payload['fields'] = payload['fields'][:_max_fields]
+            for field in payload['fields']:
+                trim(field, 'name', _max_field_name)
+                trim(field, 'value', _max_field_cont)
+
+        return payload
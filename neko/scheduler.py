@@ -0,0 +1,213 @@
+"""
+A hashed timer wheel for deferred work, such as deleting a message after a
+while.
+
+Sleeping in a coroutine for each delayed action leaves a suspended task per
+action lying around in the event loop until it wakes. With thousands of
+these, that costs memory and loop overhead for nothing. The ``Scheduler``
+instead files each action as a small entry in the slot of the wheel for the
+tick it is due on, and a single task turns the wheel while anything is
+pending. When nothing is pending, no task runs at all.
+"""
+import asyncio
+import inspect
+import math
+import time
+import typing
+
+import discord
+
+import neko.other.log as log
+
+__all__ = ['Scheduler', 'Timer']
+
+
+class Timer:
+    """
+    A pending call in a ``Scheduler``. Call ``cancel`` to stop it from
+    happening.
+    """
+    __slots__ = ('target', 'callback', 'args', '_scheduler')
+
+    def __init__(self, scheduler, target, callback, args):
+        self._scheduler = scheduler
+        self.target = target
+        self.callback = callback
+        self.args = args
+
+    @property
+    def cancelled(self) -> bool:
+        return self.callback is None and self._scheduler is None
+
+    def cancel(self):
+        """Cancels the call. This does nothing if it has already happened."""
+        scheduler = self._scheduler
+        if scheduler is not None:
+            scheduler._live -= 1
+        self._scheduler = self.callback = self.args = None
+
+
+class Scheduler(log.Loggable):
+    """
+    Runs callbacks after a delay, to within ``resolution`` seconds.
+
+    Callbacks may be plain functions or coroutine functions. Anything they
+    raise is logged, except ``discord.NotFound``, which is ignored, as it
+    usually just means someone deleted the message first.
+
+    Pending calls are held by the scheduler, not by whatever scheduled them,
+    so they still happen if the task that scheduled them is cancelled. If the
+    task turning the wheel is itself cancelled, it is restarted the next time
+    anything is scheduled.
+
+    :param resolution: seconds per tick of the wheel.
+    :param slots: number of slots in the wheel. Calls due further away than
+            one turn of the wheel just stay in their slot for more turns.
+    :param delete: optional coroutine function that ``delete_later`` passes
+            its messages to, such as ``neko.BulkDeleter.delete``. By default,
+            each message is deleted on its own.
+    """
+
+    def __init__(self,
+                 resolution: float = 0.5,
+                 slots: int = 512,
+                 loop=None,
+                 delete=None):
+        self.resolution = resolution
+        self._delete = delete
+        self._slots = [[] for _ in range(slots)]
+        self._loop = loop
+        self._epoch = time.monotonic()
+        self._processed = 0
+        self._live = 0
+        self._task = None
+
+    def __len__(self):
+        """Counts the calls still pending."""
+        return self._live
+
+    def _now_tick(self) -> int:
+        return int((time.monotonic() - self._epoch) / self.resolution)
+
+    def call_later(self, delay: float, callback, *args) -> Timer:
+        """
+        Calls ``callback(*args)`` after roughly ``delay`` seconds. If this
+        returns an awaitable, it is awaited in its own task.
+
+        :return: a Timer that can be used to cancel the call.
+        """
+        if not self._live:
+            # Nothing is pending, so there are no slots that we have yet to
+            # process. Skip straight to now.
+            self._processed = self._now_tick()
+
+        ticks = max(1, math.ceil(delay / self.resolution))
+        target = max(self._now_tick(), self._processed) + ticks
+        timer = Timer(self, target, callback, args)
+
+        self._slots[target % len(self._slots)].append(timer)
+        self._live += 1
+        self._ensure_running()
+        return timer
+
+    def delete_later(self, delay: float, *messages: discord.Message) -> Timer:
+        """Deletes each message after the delay, in the order given."""
+        if self._delete is not None:
+            return self.call_later(delay, self._delete, *messages)
+        return self.call_later(delay, self.__delete, messages)
+
+    def edit_later(self, delay: float, message: discord.Message,
+                   **fields) -> Timer:
+        """Edits the message after the delay. This takes ``edit``'s kwargs."""
+        return self.call_later(delay, self.__edit, message, fields)
+
+    def clear_reactions_later(self,
+                              delay: float,
+                              message: discord.Message) -> Timer:
+        """Clears all reactions from the message after the delay."""
+        return self.call_later(delay, message.clear_reactions)
+
+    @staticmethod
+    async def __delete(messages):
+        for message in messages:
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass
+
+    @staticmethod
+    async def __edit(message, fields):
+        await message.edit(**fields)
+
+    def close(self):
+        """Cancels everything that is pending, and stops the wheel."""
+        for slot in self._slots:
+            for timer in slot:
+                timer.cancel()
+            slot.clear()
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            loop = self._loop or asyncio.get_event_loop()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        """Turns the wheel until nothing is left pending."""
+        slots = len(self._slots)
+
+        while self._live:
+            now = self._now_tick()
+
+            if now - self._processed > slots:
+                # We fell more than a whole turn behind, so every slot is
+                # due. Visit each once rather than going round repeatedly.
+                for index in range(slots):
+                    self._fire_slot(index, now)
+                self._processed = now
+            else:
+                while self._processed < now:
+                    self._processed += 1
+                    self._fire_slot(self._processed % slots, self._processed)
+
+            next_tick = self._epoch + (self._processed + 1) * self.resolution
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def _fire_slot(self, index: int, tick: int):
+        """Fires each timer in the slot that is due by the given tick."""
+        slot = self._slots[index]
+        if not slot:
+            return
+
+        remaining = []
+        for timer in slot:
+            if timer.cancelled:
+                continue
+            elif timer.target > tick:
+                remaining.append(timer)
+            else:
+                callback, args = timer.callback, timer.args
+                timer.cancel()
+                self._fire(callback, args)
+        self._slots[index] = remaining
+
+    def _fire(self, callback, args):
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(self._await(result))
+        except discord.NotFound:
+            pass
+        except Exception:
+            self.logger.exception(f'Scheduled call to {callback} failed.')
+
+    async def _await(self, awaitable: typing.Awaitable):
+        try:
+            await awaitable
+        except discord.NotFound:
+            pass
+        except Exception:
+            self.logger.exception(f'Scheduled coroutine {awaitable} failed.')
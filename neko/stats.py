@@ -0,0 +1,320 @@
+"""
+Fixed-memory latency histograms, and per-command and per-listener counters
+built from them.
+
+Storing every sample to work out percentiles grows without bound. A
+``LogHistogram`` instead counts samples into buckets whose bounds grow
+geometrically, so it is a fixed number of integers however many samples it
+sees, and any percentile it reports is within one bucket (about 19%) of the
+true value.
+"""
+import collections
+import math
+import time
+import types
+import typing
+
+__all__ = ['LogHistogram', 'RollingHistogram', 'CommandStats',
+           'CommandStatsTable', 'ListenerStats', 'ListenerStatsTable',
+           'StepTimer']
+
+
+class LogHistogram:
+    """
+    Histogram of durations in seconds, with logarithmically sized buckets.
+
+    :param minimum: upper bound of the first bucket, in seconds. Anything
+            smaller is counted in the first bucket.
+    :param growth: how much larger each bucket's upper bound is than the
+            last one's.
+    :param buckets: how many buckets to have. Anything larger than the last
+            bucket's upper bound is counted in the last bucket.
+    """
+    __slots__ = ('minimum', 'growth', 'counts', 'count', 'total', 'worst',
+                 '_log_growth')
+
+    def __init__(self,
+                 minimum: float = 1e-5,
+                 growth: float = 2 ** 0.25,
+                 buckets: int = 96):
+        self.minimum = minimum
+        self.growth = growth
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self._log_growth = math.log(growth)
+
+    def record(self, seconds: float):
+        """Counts a sample."""
+        if seconds <= self.minimum:
+            index = 0
+        else:
+            index = min(
+                len(self.counts) - 1,
+                math.ceil(math.log(seconds / self.minimum) / self._log_growth))
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+
+    def merge(self, other: 'LogHistogram'):
+        """Adds the samples of another histogram with the same buckets."""
+        if len(other.counts) != len(self.counts):
+            raise ValueError('Histograms have different buckets.')
+
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.worst = max(self.worst, other.worst)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def upper_bound(self, index: int) -> float:
+        """Gets the upper bound of the bucket with the given index."""
+        return self.minimum * self.growth ** index
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the given quantile, such as 0.99 for the 99th percentile,
+        as the upper bound of the bucket it falls in. This never exceeds the
+        largest sample seen. If there are no samples, this is 0.
+        """
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.upper_bound(index), self.worst)
+        return self.worst
+
+
+class RollingHistogram:
+    """
+    LogHistogram of only the most recent samples. Samples are counted into
+    one histogram per ``window`` seconds, and only the last ``windows`` of
+    those are kept.
+
+    :param kwargs: passed to each LogHistogram.
+    """
+    __slots__ = ('window', '_kwargs', '_histograms', '_current_start')
+
+    def __init__(self, window: float = 60.0, windows: int = 15, **kwargs):
+        self.window = window
+        self._kwargs = kwargs
+        self._histograms = collections.deque(maxlen=windows)
+        self._current_start = None
+
+    @property
+    def span(self) -> float:
+        """Most seconds of samples this will hold."""
+        return self.window * self._histograms.maxlen
+
+    def record(self, seconds: float):
+        """Counts a sample in the current window."""
+        now = time.monotonic()
+        if (self._current_start is None
+                or now - self._current_start >= self.window):
+            self._histograms.append(LogHistogram(**self._kwargs))
+            self._current_start = now
+        self._histograms[-1].record(seconds)
+
+    def snapshot(self) -> LogHistogram:
+        """Gets a single histogram of every sample still held."""
+        merged = LogHistogram(**self._kwargs)
+        for histogram in list(self._histograms):
+            merged.merge(histogram)
+        return merged
+
+
+class CommandStats:
+    """
+    Counters and latency histograms for one command.
+
+    Latency is split into phases:
+
+    - ``checks`` - running the command's checks;
+    - ``conversion`` - parsing and converting the arguments;
+    - ``send`` - waiting on ``ctx.send``;
+    - ``body`` - everything else the command spends its time on;
+    - ``total`` - the whole invocation.
+    """
+    phases = ('checks', 'conversion', 'body', 'send', 'total')
+
+    __slots__ = ('name', 'invocations', 'errors', 'histograms')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.invocations = 0
+        self.errors = 0
+        self.histograms = {phase: LogHistogram() for phase in self.phases}
+
+    def record(self, timings: typing.Dict[str, float], total: float,
+               failed: bool):
+        """
+        Records an invocation.
+
+        :param timings: seconds spent in the checks, conversion and send
+                phases. The body is whatever is left of the total.
+        :param total: seconds the whole invocation took.
+        :param failed: True if the invocation raised an error.
+        """
+        self.invocations += 1
+        if failed:
+            self.errors += 1
+
+        accounted = 0.0
+        for phase in ('checks', 'conversion', 'send'):
+            seconds = timings.get(phase, 0.0)
+            accounted += seconds
+            self.histograms[phase].record(seconds)
+
+        self.histograms['body'].record(max(0.0, total - accounted))
+        self.histograms['total'].record(total)
+
+    def p99(self, phase='total') -> float:
+        return self.histograms[phase].quantile(0.99)
+
+
+class StepTimer:
+    """
+    Runs a coroutine, adding up only the time it spends running on the
+    event loop. Time spent suspended, such as waiting on an HTTP request,
+    is not counted, as the loop is free to do other work meanwhile.
+
+    Usage::
+
+        timer = StepTimer()
+        result = await timer.run(some_coroutine())
+        print(timer.busy)
+    """
+    __slots__ = ('busy',)
+
+    def __init__(self):
+        self.busy = 0.0
+
+    @types.coroutine
+    def run(self, coro):
+        """Runs the coroutine to completion, timing each step of it."""
+        value, error = None, None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    if error is None:
+                        yielded = coro.send(value)
+                    else:
+                        yielded = coro.throw(error)
+                except StopIteration as ex:
+                    return ex.value
+                finally:
+                    self.busy += time.perf_counter() - start
+
+                try:
+                    value, error = (yield yielded), None
+                except GeneratorExit:
+                    raise
+                except BaseException as ex:
+                    # Such as being cancelled; pass it on.
+                    value, error = None, ex
+        finally:
+            coro.close()
+
+
+class ListenerStats:
+    """
+    Counters and a histogram of the time spent on the event loop for one
+    event listener.
+
+    Times only count the steps the listener spends running, not the time it
+    spends waiting on anything it awaits, such as sending a message. So
+    ``total_time`` is how long, in total, the listener has held up the event
+    loop, which is what matters when working out what is keeping it busy.
+    ``wall_time`` is the total time from starting to finishing each call,
+    waiting included.
+    """
+    __slots__ = ('name', 'calls', 'errors', 'histogram', 'wall_time')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.histogram = LogHistogram()
+        self.wall_time = 0.0
+
+    def record(self, busy: float, wall: float, failed: bool):
+        """
+        Records a call to the listener.
+
+        :param busy: seconds the call spent running on the event loop.
+        :param wall: seconds from the call starting to it finishing.
+        :param failed: True if the call raised an error.
+        """
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.histogram.record(busy)
+        self.wall_time += wall
+
+    @property
+    def total_time(self) -> float:
+        return self.histogram.total
+
+    @property
+    def max_time(self) -> float:
+        return self.histogram.worst
+
+    def p99(self) -> float:
+        return self.histogram.quantile(0.99)
+
+
+class _StatsTable:
+    """Holds the stats for each name, creating them on first use."""
+    __slots__ = ('_stats',)
+
+    #: The type of stats held, constructed from the name.
+    stats_type = None
+
+    def __init__(self):
+        self._stats: typing.Dict[str, typing.Any] = {}
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __iter__(self):
+        return iter(list(self._stats.values()))
+
+    def __getitem__(self, name: str):
+        """Gets the stats for the name, creating them if needed."""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = self.stats_type(name)
+        return stats
+
+    def by_p99(self) -> list:
+        """Gets each entry's stats, slowest 99th percentile first."""
+        return sorted(self, key=lambda s: s.p99(), reverse=True)
+
+
+class CommandStatsTable(_StatsTable):
+    """Holds the CommandStats for each qualified command name."""
+    __slots__ = ()
+    stats_type = CommandStats
+
+
+class ListenerStatsTable(_StatsTable):
+    """Holds the ListenerStats for each event listener."""
+    __slots__ = ()
+    stats_type = ListenerStats
+
+    def by_total_time(self) -> typing.List[ListenerStats]:
+        """Gets each listener's stats, most time on the loop first."""
+        return sorted(self, key=lambda s: s.total_time, reverse=True)
@@ -9,7 +9,7 @@ import typing
 __all__ = [
     'capitalise', 'pascal_to_space', 'underscore_to_space', 'pluralise',
     'remove_single_lines', 'replace_recursive', 'ellipses', 'pluralize',
-    'capitalize', 'parse_quotes', 'PatternCollection'
+    'capitalize', 'parse_quotes', 'PatternCollection', 'StreamingPaginator'
 ]
 
 
@@ -377,3 +377,249 @@ class PatternCollection(collections.MutableSet):
 
     def __missing__(self, key):
         return getattr(self._set, key)
+
+
+class StreamingPaginator:
+    """
+    Splits text into pages of at most ``max_size`` characters in a single
+    pass, breaking long lines on the last space that fits.
+
+    Unlike ``discord.ext.commands.Paginator``, this keeps code fences
+    balanced. If a page fills up part of the way through a code block, the
+    block is closed at the end of that page and reopened, with the same
+    language, at the top of the next one.
+
+    Pages are available as soon as they fill up, so text can be streamed in
+    with ``feed`` or ``afeed`` and shown while the rest is still arriving.
+
+    :param prefix: added to the start of each page.
+    :param suffix: added to the end of each page.
+    :param max_size: the max character count of each page, including the
+            prefix and suffix.
+    :param max_lines: the max number of lines of text on each page, if set.
+    """
+    fence = '```'
+
+    def __init__(self,
+                 prefix: str = '',
+                 suffix: str = '',
+                 max_size: int = 1990,
+                 max_lines: int = None):
+        if max_lines is not None and max_lines < 1:
+            raise ValueError('Cannot set max_lines to be less than 1.')
+
+        self.prefix = prefix
+        self.suffix = suffix
+        self.max_size = max_size
+        self.max_lines = max_lines
+
+        self._pages = []
+        self._taken = 0
+        self._lines = []
+        self._count = 0
+        # The line that opened the code block we are in, or None.
+        self._open_fence = None
+        # The code block reopened at the top of the current page, or None.
+        self._page_fence = None
+
+    def _overhead(self, reopened, closing):
+        """
+        Characters on a page that are not taken by its lines. This is the
+        prefix and suffix, plus any code fence reopened at the top and
+        closed at the bottom.
+        """
+        overhead = len(self.prefix) + len(self.suffix) + 2
+        if reopened is not None:
+            overhead += len(reopened) + 1
+        if closing:
+            overhead += len(self.fence) + 1
+        return overhead
+
+    def add_line(self, line: str = '', *, empty: bool = False):
+        """
+        Adds a line of text, splitting it on spaces if it is too long to
+        fit on a page. Words too long for a page are split mid-word.
+
+        :param line: the line to add. This should not contain newlines; use
+                ``add_text`` for that.
+        :param empty: if True, a blank line is added after.
+        """
+        start, end = 0, len(line)
+
+        while True:
+            # Each piece must fit on a fresh page, which may have to reopen
+            # the code block we are in. Whether the page must close a block
+            # depends on the piece itself, as it may open one.
+            fence = self._open_fence
+            stop, resume = self._cut(line, start, end,
+                                     fence, fence is not None)
+            if fence is None and line.count(self.fence, start, stop) % 2:
+                stop, resume = self._cut(line, start, end, None, True)
+
+            self._append(line[start:stop])
+            if resume >= end:
+                break
+            start = resume
+
+        if empty:
+            self._append('')
+
+    def _cut(self, line, start, end, reopened, closing):
+        """
+        Works out where the piece of ``line`` starting at ``start`` must
+        end to fit on a fresh page, breaking on the last space that fits.
+
+        :returns: where the piece stops, and where the next piece starts.
+        """
+        width = self.max_size - self._overhead(reopened, closing) - 1
+        if width < 1:
+            raise ValueError('max_size is too small to fit any text.')
+        elif end - start <= width:
+            return end, end
+
+        # Search for the last space that fits. Each character is looked at
+        # by at most two searches, so this is linear overall.
+        cut = line.rfind(' ', start, start + width + 1)
+        if cut <= start:
+            return start + width, start + width
+        return cut, cut + 1
+
+    def add_text(self, text: str):
+        """Adds text that may span several lines."""
+        for line in text.split('\n'):
+            self.add_line(line)
+
+    def _append(self, line):
+        """Adds a line that is known to fit on an empty page."""
+        closes = opens = False
+        if line.count(self.fence) % 2:
+            if self._open_fence is None:
+                opens = True
+            else:
+                closes = True
+
+        # The fence we must close at the end of the page if this line is on
+        # it. A line closing the code block takes the place of that.
+        closing = opens or (self._open_fence is not None and not closes)
+        needed = (self._count + len(line) + 1
+                  + self._overhead(self._page_fence, closing))
+
+        if self._lines and (
+                needed > self.max_size
+                or self.max_lines is not None
+                and len(self._lines) >= self.max_lines):
+            self._break_page(len(line) + 1)
+
+        self._lines.append(line)
+        self._count += len(line) + 1
+
+        if closes:
+            self._open_fence = None
+        elif opens:
+            # Keep the language so it can be reopened with highlighting.
+            opener = line.strip()
+            if opener.startswith(self.fence):
+                self._open_fence = opener.split(None, 1)[0]
+            else:
+                self._open_fence = self.fence
+
+    def _break_page(self, incoming):
+        """
+        Closes the current page because the next line does not fit. If the
+        page ends by opening a code block, the opening line is carried onto
+        the next page instead of leaving an empty block behind.
+
+        :param incoming: the characters the next line will take up.
+        """
+        fence = self._open_fence
+        carried = self._lines[-1]
+        carry = (
+            fence is not None and len(self._lines) > 1
+            and carried.count(self.fence) % 2
+            and (self.max_lines is None or self.max_lines > 1)
+            and len(carried) + 1 + incoming + self._overhead(None, True)
+            <= self.max_size)
+
+        if not carry:
+            self.close_page()
+            return
+
+        self._lines.pop()
+        self._open_fence = None
+        self.close_page()
+        self._open_fence = fence
+        self._lines.append(carried)
+        self._count = len(carried) + 1
+
+    def close_page(self):
+        """Closes the current page, even if it is not full."""
+        if not self._lines:
+            return
+
+        parts = [self.prefix] if self.prefix else []
+        if self._page_fence is not None:
+            parts.append(self._page_fence)
+        parts.extend(self._lines)
+        if self._open_fence is not None:
+            parts.append(self.fence)
+        if self.suffix:
+            parts.append(self.suffix)
+
+        self._pages.append('\n'.join(parts))
+        self._lines = []
+        self._count = 0
+        self._page_fence = self._open_fence
+
+    @property
+    def pages(self) -> typing.List[str]:
+        """Closes the current page and returns every page so far."""
+        self.close_page()
+        return list(self._pages)
+
+    def take_completed(self) -> typing.List[str]:
+        """
+        Returns each page that has filled up since this was last called.
+        The page currently being filled is not included.
+        """
+        pages = self._pages[self._taken:]
+        self._taken = len(self._pages)
+        return pages
+
+    def take_all(self) -> typing.List[str]:
+        """Closes the current page, then returns any pages not yet taken."""
+        self.close_page()
+        return self.take_completed()
+
+    def feed(self, source: typing.Iterable[str]) -> typing.Iterator[str]:
+        """
+        Adds each string from the iterable with ``add_text``, yielding pages
+        as they fill up. The last page is yielded once the iterable is
+        exhausted.
+        """
+        for text in source:
+            self.add_text(text)
+            yield from self.take_completed()
+        yield from self.take_all()
+
+    async def afeed(self,
+                    source: typing.Union[typing.Iterable[str],
+                                         typing.AsyncIterable[str]]):
+        """
+        Async version of ``feed``. This accepts an iterable or an async
+        iterable, and is an async generator of pages.
+        """
+        if hasattr(source, '__aiter__'):
+            async for text in source:
+                self.add_text(text)
+                for page in self.take_completed():
+                    yield page
+        else:
+            for text in source:
+                self.add_text(text)
+                for page in self.take_completed():
+                    yield page
+                # Let anything else waiting on the loop have a go.
+                await asyncio.sleep(0)
+
+        for page in self.take_all():
+            yield page
@@ -0,0 +1,158 @@
+"""
+Watches the event loop from another thread, and catches whatever blocks it.
+
+Anything that blocks the loop thread, such as saving an image or opening a
+file outside the thread pool, holds up every other command, listener and
+heartbeat for as long as it runs. From inside the loop, all you can tell is
+that something was late. The ``LoopWatchdog`` runs on its own thread and
+keeps poking the loop. When the loop takes too long to answer, it grabs the
+loop thread's stack there and then, which points at the line that is
+blocking it.
+"""
+import asyncio
+import collections
+import datetime
+import sys
+import threading
+import time
+import traceback
+import typing
+
+import neko.other.log as log
+import neko.stats as stats
+
+__all__ = ['LoopWatchdog', 'Stall']
+
+
+class Stall:
+    """A time the event loop was blocked for longer than the threshold."""
+    __slots__ = ('when', 'lag', 'task', 'stack')
+
+    def __init__(self, when: datetime.datetime, task: str, stack: str):
+        self.when = when
+        self.task = task
+        self.stack = stack
+        # Updated once the loop gets going again.
+        self.lag = None
+
+
+def _task_name(task) -> str:
+    if task is None:
+        return 'no task (a callback, or the loop itself)'
+    if hasattr(task, 'get_name'):
+        return f'{task.get_name()} ({task.get_coro().__qualname__})'
+    # noinspection PyProtectedMember
+    coro = getattr(task, '_coro', None)
+    return getattr(coro, '__qualname__', repr(task))
+
+
+def _current_task(loop):
+    if hasattr(asyncio, 'current_task'):
+        return asyncio.current_task(loop)
+    return asyncio.Task.current_task(loop)
+
+
+class LoopWatchdog(log.Loggable):
+    """
+    Measures how long the event loop takes to run a callback posted to it
+    from another thread, every ``interval`` seconds.
+
+    Every measurement is recorded in ``lag``, a histogram of the last 15
+    minutes. When a measurement passes ``threshold`` seconds, the stack of
+    the loop thread and the task it is running are logged, and kept in
+    ``stalls``.
+
+    :param loop: the event loop to watch.
+    :param interval: seconds between each measurement.
+    :param threshold: seconds of lag before we capture the stack.
+    :param max_stalls: how many of the most recent stalls to keep.
+    """
+
+    def __init__(self,
+                 loop,
+                 interval: float = 0.25,
+                 threshold: float = 0.5,
+                 max_stalls: int = 16):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = stats.RollingHistogram()
+        self.last_lag = 0.0
+        self.stalls: typing.Deque[Stall] = collections.deque(
+            maxlen=max_stalls)
+
+        self._loop_thread_id = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts watching. This must be called from the thread running the
+        loop, as that is the thread whose stack we capture.
+        """
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        # A fresh event, so a thread still winding down from a previous
+        # stop() does not start up again.
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stopping,),
+            name='Nekozilla loop watchdog',
+            daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops watching. The thread exits at its next measurement."""
+        self._stopping.set()
+        self._thread = None
+
+    def _run(self, stopping: threading.Event):
+        while not stopping.wait(self.interval):
+            answered = threading.Event()
+            start = time.perf_counter()
+            try:
+                self.loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # The loop is closed.
+                return
+
+            stall = None
+            if not answered.wait(self.threshold):
+                stall = self._capture()
+                while not answered.wait(self.interval):
+                    if stopping.is_set():
+                        return
+
+            lag = time.perf_counter() - start
+            self.last_lag = lag
+            self.lag.record(lag)
+
+            if stall is not None:
+                stall.lag = lag
+                self.logger.warning(
+                    f'Event loop was blocked for {lag:.3f}s in {stall.task}')
+
+    def _capture(self) -> Stall:
+        """Captures what the loop thread is doing right now."""
+        # noinspection PyProtectedMember
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame else ''
+
+        try:
+            task = _current_task(self.loop)
+        except RuntimeError:
+            task = None
+
+        stall = Stall(datetime.datetime.now(), _task_name(task), stack)
+        self.stalls.append(stall)
+        self.logger.warning(
+            f'Event loop has been blocked for over {self.threshold}s in '
+            f'{stall.task}. It is currently at:\n{stack}')
+        return stall
@@ -7,8 +7,8 @@ it was a complete and utter bastard to get working the way I wanted...
 """
 import asyncio
 import collections
-import copy
 import enum
+import functools
 import re
 import time
 import typing
@@ -19,10 +19,6 @@ import neko
 import neko.other.perms as perms
 
 
-unit_pattern = \
-    r'(?:\s|^)([-+]?(?:(?:\d+)\.\d+|\d+)(?:[eE][-+]?\d+)?) ?([-°^"/\w]+)(?:\b)'
-unit_pattern = re.compile(unit_pattern, re.I | re.U)
-
 ConversionToken = collections.namedtuple('ConversionToken', [
     'magnitude',
     'unit'
@@ -66,327 +62,470 @@ def _reverse_map(dictionary) -> dict:
     return result
 
 
-@enum.unique
-class Dim(enum.IntEnum):
-    """Represents dimensions of measurement."""
-    distance = enum.auto()
-    # time = enum.auto()
-    speed = enum.auto()
-    force = enum.auto()
-    volume = enum.auto()
-    mass = enum.auto()
-    temperature = enum.auto()
-
-
-@enum.unique
-class Unit(enum.IntEnum):
-    """Represents valid units of measurement to parse."""
-
-    # Short distances
-    meter = enum.auto()
-    # yard = enum.auto()
-    inch = enum.auto()
-    foot = enum.auto()
-    centimeter = enum.auto()
-    # millimeter = enum.auto()
-
-    # Long distances
-    kilometer = enum.auto()
-    mile = enum.auto()
-    # nautical_mile = enum.auto()
-
-    # Time
-    # second = enum.auto()
-    # minute = enum.auto()
-    # hour = enum.auto()
-    # day = enum.auto()
-    # week = enum.auto()
-    # month = enum.auto()
-    # year = enum.auto()
-
-    # Speed
-    meters_per_second = enum.auto()
-    kilometers_per_hour = enum.auto()
-    miles_per_hour = enum.auto()
-    # knots = enum.auto()
-
-    # Force
-    newton = enum.auto()
-    pound_force = enum.auto()
-
-    # Volume
-    meters3 = enum.auto()
-    cubic_centimeters = enum.auto()
-    liters = enum.auto()
-    pint = enum.auto()
-    uk_gal = enum.auto()
-    us_gal = enum.auto()
-    teaspoon = enum.auto()
-    tablespoon = enum.auto()
-
-    # Mass
-    kilogram = enum.auto()
-    gram = enum.auto()
-    stone = enum.auto()
-    pound_mass = enum.auto()
-    ounce = enum.auto()
-    tonne = enum.auto()
-    ton = enum.auto()
-
-    # Temperature
-    kelvin = enum.auto()
-    celcius = enum.auto()
-    fahrenheit = enum.auto()
+# SI (and binary) prefixes we know how to expand units with.
+# Symbol -> (name, factor).
+si_prefixes = {
+    'T': ('tera', 1e12),
+    'G': ('giga', 1e9),
+    'M': ('mega', 1e6),
+    'k': ('kilo', 1e3),
+    'h': ('hecto', 1e2),
+    'd': ('deci', 1e-1),
+    'c': ('centi', 1e-2),
+    'm': ('milli', 1e-3),
+    'µ': ('micro', 1e-6),
+    'n': ('nano', 1e-9),
+    'Ki': ('kibi', 2 ** 10),
+    'Mi': ('mebi', 2 ** 20),
+    'Gi': ('gibi', 2 ** 30),
+    'Ti': ('tebi', 2 ** 40),
+}
 
 
-# Maps dimensions to their SI units.
-dim2si = {
-    Dim.distance: Unit.meter,
-    # Dim.time: Unit.second,
-    Dim.speed: Unit.meters_per_second,
-    Dim.force: Unit.newton,
-    Dim.volume: Unit.meters3,
-    Dim.mass: Unit.kilogram,
-    Dim.temperature: Unit.kelvin,
+"""
+Declares a unit of measurement, along with any prefixed variants of it.
+
+Any of the name, symbols or names may contain a ``{}`` which is substituted
+with the prefix when expanding. If there is no ``{}``, the prefix is put at
+the start. The first symbol (or first name if there are no symbols) is the
+one used when displaying a measurement.
+
+- ``scale``, ``offset`` - SI = magnitude * scale + offset.
+- ``prefixes`` - prefix symbols to expand into extra units.
+- ``shown`` - whether to output conversions to the unprefixed unit.
+- ``shown_prefixes`` - the prefixed units to output conversions to. All
+        prefixed units are always parsed as input.
+- ``power`` - the power to raise the prefix factor to, e.g. 3 for volumes.
+- ``bare`` - whether to parse the unprefixed symbols. Some, like ``s`` or
+        ``g``, produce too many false positives on their own.
+- ``extra`` - maps a prefix symbol (or ``''`` for none) to any additional
+        aliases for that specific unit.
+"""
+UnitDefinition = collections.namedtuple('UnitDefinition', [
+    'name', 'scale', 'offset', 'symbols', 'names', 'prefixes', 'shown',
+    'shown_prefixes', 'power', 'bare', 'extra'
+])
+
+
+def _unit(name, scale, *, offset=0, symbols=(), names=(), prefixes=(),
+          shown=True, shown_prefixes=(), power=1, bare=True, extra=None):
+    """Shorthand to declare a UnitDefinition with sensible defaults."""
+    return UnitDefinition(name, scale, offset, symbols, names, prefixes,
+                          shown, shown_prefixes, power, bare, extra or {})
+
+
+# Every unit we understand, grouped by dimension. The first unit in each
+# dimension is the SI unit for that dimension, and must have a scale of 1.
+# This is compiled once at import into the enums and lookup tables below,
+# so adding units here costs nothing per message.
+unit_registry = {
+    'distance': (
+        _unit('{}meter', 1,
+              symbols=('m',),
+              names=('{}meter', '{}meters', '{}metre', '{}metres'),
+              prefixes=('k', 'c', 'm', 'µ', 'n'),
+              shown_prefixes=('k', 'c', 'm')),
+        _unit('inch', 0.0254, names=('inch', 'inches')),
+        _unit('foot', 0.3048,
+              symbols=('ft',), names=('foot', 'feet', 'foots', 'feets')),
+        _unit('yard', 0.9144, symbols=('yd',), names=('yard', 'yards')),
+        _unit('mile', 1609.34, symbols=('mi',), names=('mile', 'miles')),
+        # "NM" is matched exactly before anything is case-folded, so it is
+        # a nautical mile while "nm" is still a nanometer.
+        _unit('nautical_mile', 1852,
+              symbols=('NMI', 'NM'),
+              names=('nauticalmile', 'nauticalmiles', 'nautical mile',
+                     'nautical miles'),
+              shown=False),
+    ),
+    # Plain words like "12 years old" or "3 hours" come up all the time in
+    # chat without anyone wanting them converted, so time units are only
+    # parsed from their abbreviations.
+    'time': (
+        _unit('{}second', 1,
+              symbols=('s',),
+              names=('{}sec', '{}secs'),
+              prefixes=('m', 'µ', 'n'),
+              bare=False),
+        _unit('minute', 60, symbols=('min',), names=('mins',)),
+        # "h" and "d" alone are too easily part of something else, like
+        # "3d printer", so hours are only parsed from "hr" or "hrs", and
+        # days are never parsed.
+        _unit('hour', 60 ** 2,
+              symbols=('h',), names=('hr', 'hrs'),
+              bare=False),
+        _unit('day', 24 * 60 ** 2, symbols=('d',), bare=False),
+        _unit('week', 7 * 24 * 60 ** 2, symbols=('wk',), names=('wks',)),
+        _unit('year', 365.25 * 24 * 60 ** 2, symbols=('yr',), names=('yrs',)),
+    ),
+    'speed': (
+        _unit('meters_per_second', 1,
+              symbols=('m/s',), names=('mps', 'ms^-1')),
+        _unit('kilometers_per_hour', 10 / 36,
+              symbols=('km/h',),
+              names=('kph', 'km/hr', 'km/hour', 'km/hours', 'kmph')),
+        _unit('miles_per_hour', 0.44704, symbols=('mph',), names=('mi/h',)),
+        _unit('knots', 0.514444,
+              symbols=('kt',), names=('kts', 'knot', 'knots')),
+    ),
+    'force': (
+        _unit('{}newton', 1,
+              symbols=('N',),
+              names=('{}newton', '{}newtons'),
+              prefixes=('k', 'M'),
+              shown_prefixes=('k',),
+              bare=False),
+        _unit('pound_force', 4.44822,
+              symbols=('lbf',),
+              names=('poundforce', 'pound-force', 'pounds-force',
+                     'poundsforce')),
+    ),
+    'area': (
+        _unit('square_{}meter', 1,
+              symbols=('m²', 'm2', 'm^2'),
+              names=('sq {}m', 'square {}meter', 'square {}meters',
+                     'square {}metre', 'square {}metres'),
+              prefixes=('k', 'c', 'm'),
+              shown_prefixes=('k',),
+              power=2),
+        _unit('square_foot', 0.092903,
+              symbols=('ft²', 'ft2', 'ft^2'),
+              names=('sq ft', 'sqft', 'square foot', 'square feet')),
+        _unit('square_mile', 2.58999e6,
+              symbols=('mi²', 'mi2', 'mi^2'),
+              names=('sq mi', 'square mile', 'square miles')),
+        _unit('acre', 4046.86, names=('acre', 'acres')),
+        _unit('hectare', 1e4, symbols=('ha',), names=('hectare', 'hectares')),
+    ),
+    'volume': (
+        _unit('cubic_{}meter', 1,
+              symbols=('m³', 'm3', 'm^3'),
+              names=('{}meters3', 'cubic {}meter', 'cubic {}meters',
+                     'cubic {}metre', 'cubic {}metres'),
+              prefixes=('c',),
+              shown_prefixes=('c',),
+              power=3,
+              extra={'c': ('cc', 'ccs')}),
+        _unit('{}liter', 0.001,
+              symbols=('L',),
+              names=('{}liter', '{}liters', '{}litre', '{}litres'),
+              prefixes=('m', 'c', 'd'),
+              shown_prefixes=('m',),
+              extra={'': ('li',)}),
+        _unit('pint', 0.000568261,
+              symbols=('pnt',), names=('pt', 'pnt.', 'pint', 'pints')),
+        _unit('uk_gal', 0.00454609,
+              names=('gal (imperial)', 'gal', 'ukgal', 'gallon', 'gallons')),
+        _unit('us_gal', 0.00378541,
+              names=('gal (US)', 'usgal', 'US-gallon', 'US-gallons')),
+        _unit('teaspoon', 5.91939e-6,
+              symbols=('tsp',),
+              names=('tspn', 'tsp.', 'teaspoon', 'teaspoons')),
+        _unit('tablespoon', 1.77582e-5,
+              symbols=('Tbsp',),
+              names=('tblsp', 'tablespoon', 'tablespoons')),
+    ),
+    'mass': (
+        _unit('kilogram', 1,
+              symbols=('kg',),
+              names=('kilogram', 'kilograms', 'kilogramme', 'kilogrammes',
+                     'kilo', 'kilos')),
+        _unit('{}gram', 0.001,
+              symbols=('g',),
+              names=('{}gram', '{}grams', '{}gramme', '{}grammes'),
+              prefixes=('m', 'µ'),
+              bare=False),
+        _unit('stone', 6.35029, symbols=('st',), names=('stone', 'stones')),
+        _unit('pound_mass', 0.453592,
+              symbols=('lbs',), names=('lb', 'pound', 'pounds')),
+        _unit('ounce', 0.0283495, symbols=('oz',), names=('ounce', 'ounces')),
+        _unit('tonne', 1000, names=('tonne', 'tonnes')),
+        _unit('ton', 907.185, names=('ton (US)', 'ton', 'tons')),
+    ),
+    'temperature': (
+        _unit('kelvin', 1,
+              names=('kelvin', 'kelvins', '°K', 'degK', 'degreesK')),
+        _unit('celcius', 1,
+              offset=273.15,
+              symbols=('°C',),
+              names=('degC', 'degreeC', 'degreesC', 'Celcius', 'Celsius',
+                     'centigrade', 'C')),
+        _unit('fahrenheit', 5 / 9,
+              offset=459.67 * 5 / 9,
+              symbols=('°F',),
+              names=('degF', 'degreeF', 'degreesF', 'fahrenheit', 'F')),
+    ),
+    'pressure': (
+        _unit('{}pascal', 1,
+              symbols=('Pa',),
+              names=('{}pascal', '{}pascals'),
+              prefixes=('h', 'k', 'M'),
+              shown=False,
+              shown_prefixes=('k',)),
+        _unit('{}bar', 1e5,
+              symbols=('bar',),
+              names=('{}bars',),
+              prefixes=('m',),
+              shown_prefixes=('m',)),
+        _unit('atmosphere', 101325,
+              symbols=('atm',), names=('atmosphere', 'atmospheres')),
+        _unit('psi', 6894.76, symbols=('psi',)),
+        _unit('mmhg', 133.322, symbols=('mmHg',), shown=False),
+    ),
+    'energy': (
+        _unit('{}joule', 1,
+              symbols=('J',),
+              names=('{}joule', '{}joules'),
+              prefixes=('k', 'M', 'G'),
+              shown_prefixes=('k', 'M')),
+        _unit('{}calorie', 4.184,
+              symbols=('cal',),
+              names=('{}calorie', '{}calories'),
+              prefixes=('k',),
+              shown_prefixes=('k',)),
+        _unit('{}watt_hour', 3600,
+              symbols=('Wh',),
+              names=('{}watt-hour', '{}watt-hours'),
+              prefixes=('k', 'M'),
+              shown=False,
+              shown_prefixes=('k',)),
+        _unit('electronvolt', 1.602176634e-19,
+              symbols=('eV',), names=('electronvolt', 'electronvolts'),
+              shown=False),
+        _unit('btu', 1055.06, symbols=('BTU',), shown=False),
+    ),
+    'data_size': (
+        _unit('{}byte', 1,
+              symbols=('B',),
+              names=('{}byte', '{}bytes'),
+              prefixes=('k', 'M', 'G', 'T', 'Ki', 'Mi', 'Gi', 'Ti'),
+              shown_prefixes=('k', 'M', 'G', 'T'),
+              bare=False),
+        # Plain "bits" is usually not about data, so only the prefixed
+        # names are parsed.
+        _unit('{}bit', 0.125,
+              symbols=('b',),
+              prefixes=('k', 'M', 'G'),
+              shown=False,
+              bare=False,
+              extra={'k': ('kilobit', 'kilobits'),
+                     'M': ('megabit', 'megabits'),
+                     'G': ('gigabit', 'gigabits')}),
+    ),
 }
 
+
+def _apply_prefix(template: str, prefix: str) -> str:
+    """Puts the prefix where the ``{}`` is, or at the start otherwise."""
+    return template.format(prefix) if '{}' in template else prefix + template
+
+
+def _expand_unit(definition: UnitDefinition):
+    """
+    Yields a tuple of (name, scale, offset, display alias, aliases, shown)
+    for the unprefixed unit, followed by each of its prefixed variants.
+    """
+    for prefix in ('', *definition.prefixes):
+        if prefix:
+            prefix_name, factor = si_prefixes[prefix]
+            factor **= definition.power
+        else:
+            prefix_name, factor = '', 1
+
+        symbols = [_apply_prefix(s, prefix) for s in definition.symbols]
+        names = [_apply_prefix(n, prefix_name) for n in definition.names]
+
+        aliases = symbols if prefix or definition.bare else []
+        aliases = [*aliases, *names, *definition.extra.get(prefix, ())]
+
+        if prefix:
+            shown = prefix in definition.shown_prefixes
+        else:
+            shown = definition.shown
+
+        yield (_apply_prefix(definition.name, prefix_name),
+               definition.scale * factor,
+               definition.offset,
+               (symbols or names)[0],
+               aliases,
+               shown)
+
+
+def _compile_registry(registry):
+    """
+    Compiles the unit registry into the dimension and unit enums, and the
+    tables mapping between them.
+    """
+    dims = enum.IntEnum('Dim', list(registry), module=__name__)
+    dims.__doc__ = 'Represents dimensions of measurement.'
+
+    expanded = [
+        (dim_name, unit)
+        for dim_name, definitions in registry.items()
+        for definition in definitions
+        for unit in _expand_unit(definition)
+    ]
+
+    units = enum.IntEnum('Unit', [u[0] for _, u in expanded], module=__name__)
+    units.__doc__ = 'Represents valid units of measurement to parse.'
+
+    compiled = {
+        'dim2unit': collections.defaultdict(list),
+        'dim2shown': collections.defaultdict(list),
+        'unit2alias': {},
+        'unit2display': {},
+        'unit2si_affine': {},
+    }
+
+    for dim_name, (name, scale, offset, display, aliases, shown) in expanded:
+        dim, unit = dims[dim_name], units[name]
+        compiled['dim2unit'][dim].append(unit)
+        if shown:
+            compiled['dim2shown'][dim].append(unit)
+        compiled['unit2alias'][unit] = aliases
+        compiled['unit2display'][unit] = display
+        compiled['unit2si_affine'][unit] = (scale, offset)
+
+    # The first unit declared for each dimension is its SI unit.
+    compiled['dim2si'] = {d: us[0] for d, us in compiled['dim2unit'].items()}
+    return dims, units, compiled
+
+
+Dim, Unit, _compiled = _compile_registry(unit_registry)
+
+# Maps dimensions to their SI units.
+dim2si: typing.Dict[Dim, Unit] = _compiled['dim2si']
+
 # Maps SI units to their dimension.
 si2dim = _reverse_map(dim2si)
 
 # Bind units to their dimensionality
-dim2unit = {
-    Dim.distance: [
-        Unit.meter,
-        # Unit.yard,
-        Unit.inch,
-        Unit.foot,
-        Unit.mile,
-        Unit.kilometer,
-        # Unit.nautical_mile,
-        Unit.centimeter,
-        # Unit.millimeter
-    ],
-    # Dim.time: [
-    #     Unit.second,
-    #     Unit.minute,
-    #     Unit.hour,
-    #     Unit.day,
-    #     Unit.week,
-    #     Unit.month,
-    #     Unit.year,
-    # ],
-    Dim.speed: [
-        Unit.meters_per_second,
-        Unit.kilometers_per_hour,
-        Unit.miles_per_hour,
-        # Unit.knots,
-    ],
-    Dim.force: [
-        Unit.newton,
-        Unit.pound_force,
-    ],
-    Dim.volume: [
-        Unit.meters3,
-        Unit.cubic_centimeters,
-        Unit.liters,
-        Unit.pint,
-        Unit.uk_gal,
-        Unit.us_gal,
-        Unit.teaspoon,
-        Unit.tablespoon,
-    ],
-    Dim.mass: [
-        Unit.kilogram,
-        Unit.gram,
-        Unit.stone,
-        Unit.pound_mass,
-        Unit.ounce,
-        Unit.tonne,
-        Unit.ton,
-    ],
-    Dim.temperature: [
-        Unit.kelvin,
-        Unit.celcius,
-        Unit.fahrenheit,
-    ]
-}
+dim2unit: typing.Dict[Dim, typing.List[Unit]] = dict(_compiled['dim2unit'])
+
+# The units in each dimension that we output conversions to.
+dim2shown: typing.Dict[Dim, typing.List[Unit]] = dict(_compiled['dim2shown'])
 
 # Create a reverse mapping of each unit to their dimensionality.
 unit2dim = _reverse_map(dim2unit)
 
+# Affine coefficients to convert each unit into its SI unit.
+# SI = magnitude * scale + offset.
+# Input = Unit; Output = (scale, offset).
+unit2si_affine: typing.Dict[Unit, typing.Tuple[float, float]] = \
+    _compiled['unit2si_affine']
 
-# Returns the input value. Used for SI unit conversions to themselves.
-def __si_u(x): return x
-
-
-def __k_chk(k):
-    """
-    Ensures a kelvin value is not below absolute zero. If it is
-    not, we raise a ValueError instead. If it is valid, we return it.
-    """
-    if k < 0:
-        if k % 1 == 0:
-            k = int(k)
-        raise ValueError(f'{k}K is below absolute zero, and is invalid.')
-    return k
-
-
-# Converts any SI quantity to the unit.
-# Input = Si; Output = Unit.
-si2unit_conversion = {
-    Unit.meter: __si_u,
-    # Unit.yard: lambda v: v * 1.09361,
-    Unit.inch: lambda v: v * 39.3701,
-    Unit.foot: lambda v: v * 3.28084,
-    Unit.kilometer: lambda v: v * 0.001,
-    Unit.mile: lambda v: v * 0.000621371,
-    # Unit.nautical_mile: lambda v: v * 0.000539957,
-    Unit.centimeter: lambda v: v * 100,
-    # Unit.millimeter: lambda v: v * 1000,
-
-    # Unit.second: __si_u,
-    # Unit.minute: lambda v: v / 60,
-    # Unit.hour: lambda v: v / (60 ** 2),
-    # Unit.day: lambda v: v / (24 * 60 ** 2),
-    # Unit.week: lambda v: v / (7 * 24 * 60 ** 2),
-    # Unit.month: lambda v: v / (30 * 24 * 60 ** 2),
-    # Unit.year: lambda v: v / (365 * 24 * 60 ** 2),
-
-    Unit.meters_per_second: __si_u,
-    Unit.kilometers_per_hour: lambda v: v * 3.6,
-    Unit.miles_per_hour: lambda v: v * 2.23694,
-    # Unit.knots: lambda v: v * 1.94384,
-
-    Unit.newton: __si_u,
-    Unit.pound_force: lambda v: v * 0.224809,
-
-    Unit.meters3: __si_u,
-    Unit.cubic_centimeters: lambda v: v * 1e6,
-    Unit.liters: lambda v: v * 1000,
-    Unit.pint: lambda v: v * 1759.75,
-    Unit.uk_gal: lambda v: v * 219.969,
-    Unit.us_gal: lambda v: v * 264.172,
-    Unit.teaspoon: lambda v: v * 168936,
-    Unit.tablespoon: lambda v: v * 56312.1,
-
-    Unit.gram: __si_u,
-    Unit.kilogram: lambda v: v * 0.001,
-    Unit.stone: lambda v: v * 0.000157473,
-    Unit.pound_mass: lambda v: v * 0.00220462,
-    Unit.ounce: lambda v: v * 0.035274,
-    Unit.tonne: lambda v: v * 1e-6,
-    Unit.ton: lambda v: v * 1.10231e-6,
-
-    Unit.kelvin: __k_chk,
-    Unit.celcius: lambda v: __k_chk(v) - 273.15,
-    Unit.fahrenheit: lambda v: 9 / 5 * __k_chk(v) - 459.67,
-}
+# Aliases we parse for each unit.
+unit2alias: typing.Dict[Unit, typing.List[str]] = _compiled['unit2alias']
 
-# Converts unit measurements to Si measurements.
-# Input = Unit; Output = Si;
-unit2si_conversion = {
-    Unit.meter: __si_u,
-    # Unit.yard: lambda v: v * 0.9144,
-    Unit.inch: lambda v: v * 0.0254,
-    Unit.foot: lambda v: v * 0.3048,
-    Unit.kilometer: lambda v: v * 1000,
-    Unit.mile: lambda v: v * 1609.34,
-    # Unit.nautical_mile: lambda v: v * 1852,
-    Unit.centimeter: lambda v: v / 100,
-    # Unit.millimeter: lambda v: v / 1000,
-    # Unit.second: __si_u,
-    # Unit.minute: lambda v: v * 60,
-    # Unit.hour: lambda v: v * 60 ** 2,
-    # Unit.day: lambda v: v * 24 * 60 ** 2,
-    # Unit.week: lambda v: v * 7 * 24 * 60 ** 2,
-    # Unit.month: lambda v: v * 30 * 24 * 60 ** 2,
-    # Unit.year: lambda v: v * 365 * 24 * 60 ** 2,
-    Unit.meters_per_second: __si_u,
-    Unit.kilometers_per_hour: lambda v: v * 10/36,
-    Unit.miles_per_hour: lambda v: v * 0.44704,
-    # Unit.knots: lambda v: v * 0.514444,
-    Unit.newton: __si_u,
-    Unit.pound_force: lambda v: v * 4.44822,
-    Unit.meters3: __si_u,
-    Unit.cubic_centimeters: lambda v: v * 1e-6,
-    Unit.liters: lambda v: v * 0.001,
-    Unit.pint: lambda v: v * 0.000568261,
-    Unit.uk_gal: lambda v: v * 0.00454609,
-    Unit.us_gal: lambda v: v * 0.00378541,
-    Unit.teaspoon: lambda v: v * 5.91939e-6,
-    Unit.tablespoon: lambda v: v * 1.77582e-5,
-    Unit.gram: __si_u,
-    Unit.kilogram: lambda v: v * 1000,
-    Unit.stone: lambda v: v * 6350.29,
-    Unit.pound_mass: lambda v: v * 453.592,
-    Unit.ounce: lambda v: v * 28.3495,
-    Unit.tonne: lambda v: v * 1000000,
-    Unit.ton: lambda v: v * 907185,
-    Unit.kelvin: __k_chk,
-    Unit.celcius: lambda v: __k_chk(v + 273.15),
-    Unit.fahrenheit: lambda v: __k_chk((v + 459.67) * 5 / 9),
-}
+# The abbreviation used when printing out a value for each unit.
+unit2display: typing.Dict[Unit, str] = _compiled['unit2display']
 
-# Aliases for measurement names
-# The first in this list is always used when printing out the
-# value in a readable format, and should be an abbreviated value.
-unit2alias = {
-    Unit.meter: ['m', 'meter', 'meters'],
-    Unit.centimeter: ['cm', 'centimeter', 'centimeters'],
-    # Unit.millimeter: ['mm', 'millimeter', 'millimeters'],
-    # Unit.yard: ['yd', 'yard', 'yards'],
-    Unit.inch: ['inch', 'inches'],
-    Unit.foot: ['ft', 'foots', 'feet', 'feets', 'foot'],
-    Unit.kilometer: ['km', 'kilometer', 'kilometers'],
-    Unit.mile: ['mi', 'mile', 'miles'],
-    # Unit.nautical_mile: ['NMI',
-    #                     'nauticalmile',
-    #                     'nauticalmiles',
-    #                     'NM',
-    #                     'NAUTIMI'
-    #                     ],
-    # Unit.second: ['second', 'seconds', 'sec', 'secs'],
-    # Unit.minute: ['min', 'minute', 'minutes', 'mins'],
-    # Unit.hour: ['hr', 'hour', 'hours', 'hrs'],
-    # Unit.day: ['dy', 'day', 'dys', 'days'],
-    # Unit.week: ['wk', 'week', 'wks', 'weeks'],
-    # Unit.month: ['mon', 'mons', 'month', 'months'],
-    # Unit.year: ['yr', 'yrs', 'year', 'years'],
-    Unit.meters_per_second: ['m/s', 'mps', 'ms^-1'],
-    Unit.kilometers_per_hour: ['km/h', 'kph', 'km/hr', 'km/hour', 'km/hours',
-                               'kmph'
-                               ],
-    Unit.miles_per_hour: ['mph', 'mi/h'],
-    # Unit.knots: ['KN', 'kt', 'knot', 'knots'],
-    Unit.newton: ['newton', 'newtons'],
-    Unit.pound_force: ['lbf', 'poundforce', 'pound-force',
-                       'pounds-force', 'poundsforce'
-                       ],
-    Unit.meters3: ['m³', 'm3', 'meters3'],
-    Unit.cubic_centimeters: ['cm³', 'cc', 'ccs'],
-    Unit.liters: ['L', 'li', 'litre', 'liter', 'litres', 'liters'],
-    Unit.pint: ['pnt', 'pt', 'pnt.', 'pint', 'pints'],
-    Unit.uk_gal: ['gal (imperial)', 'gal', 'ukgal', 'gallon', 'gallons'],
-    Unit.us_gal: ['gal (US)', 'usgal', 'US-gallon', 'US-gallons'],
-    Unit.teaspoon: ['tsp', 'tspn', 'tsp.', 'teaspoon', 'teaspoons'],
-    Unit.tablespoon: ['Tbsp', 'tblsp', 'tablespoon', 'tablespoons'],
-    Unit.kilogram: ['kg', 'kilogram', 'kilo', 'kilograms', 'kilogramme',
-                    'kilogrammes', 'kilos'],
-    Unit.gram: ['gram', 'gramme', 'grams', 'grammes'],
-    Unit.stone: ['st', 'stone', 'stones'],
-    Unit.pound_mass: ['lbs', 'lb', 'pound', 'pounds'],
-    Unit.ounce: ['oz', 'ounce', 'ounces'],
-    Unit.tonne: ['tonne', 'tonnes'],
-    Unit.ton: ['ton (US)', 'ton', 'tons'],
-    Unit.kelvin: ['kelvin', '°K', 'degK', 'degreesK'],
-    Unit.celcius: ['°C', 'degC', 'degreeC', 'degreesC', 'Celcius', 'centigrade',
-                   'C'],
-    Unit.fahrenheit: ['°F', 'degF', 'degreeF', 'degreesF', 'fahrenheit', 'F'],
+# Lowest valid SI magnitude for dimensions that have one, along with what to
+# call it. Anything below this is rejected with a ValueError.
+dim2si_minimum = {
+    Dim.temperature: (0, 'absolute zero'),
 }
 
+
+# Per-dimension conversion table. Each unit we output in the dimension has
+# its coefficients held at the same index across the coefficient arrays.
+#   magnitude = si * from_si_scales[i] + from_si_offsets[i]
+DimensionTable = collections.namedtuple('DimensionTable', [
+    'units',
+    'from_si_scales',
+    'from_si_offsets',
+    'aliases',
+])
+
+
+def _build_dimension_tables() -> typing.Dict[Dim, DimensionTable]:
+    """
+    Precomputes the coefficient arrays for every dimension. This is done
+    once at import so that converting a token is just arithmetic.
+    """
+    tables = {}
+    for dimension, units in dim2shown.items():
+        units = tuple(units)
+        scales = tuple(unit2si_affine[u][0] for u in units)
+        offsets = tuple(unit2si_affine[u][1] for u in units)
+
+        tables[dimension] = DimensionTable(
+            units=units,
+            from_si_scales=tuple(1 / s for s in scales),
+            from_si_offsets=tuple(-o / s for s, o in zip(scales, offsets)),
+            aliases=tuple(unit2display[u] for u in units),
+        )
+    return tables
+
+
 # Create a reverse mapping
 alias2unit = _reverse_map(unit2alias)
 
+
+def _build_alias_index(mapping) -> dict:
+    """
+    Builds a case-folded lookup of alias to unit from the given alias map.
+
+    If two aliases fold to the same key, the first one defined wins. Exact
+    matches should be looked up in ``alias2unit`` first, so that ``MB`` and
+    ``Mb`` still resolve to different units.
+    """
+    index = {}
+    for alias, unit in mapping.items():
+        index.setdefault(alias.strip().casefold(), unit)
+    return index
+
+
+def _trie_pattern(words) -> str:
+    """
+    Produces a regex alternation matching any of the given words, factored
+    into a prefix tree. The engine then only ever considers the branches
+    that can still match, so the cost of matching does not grow with the
+    number of words.
+
+    Longer matches are preferred over shorter ones.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child)
+                    for char, child in sorted(node.items()) if char]
+
+        if not branches:
+            return ''
+
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if '' in node else body
+
+    return emit(trie)
+
+
+def _compile_unit_pattern(aliases) -> typing.Pattern:
+    """
+    Compiles the token regex with the known unit aliases inlined as an
+    alternation, so that anything followed by an unknown unit is rejected
+    by the regex engine rather than by a lookup afterwards.
+
+    The trailing negative lookahead ensures we only match whole units.
+    """
+    return re.compile(
+        r'(?:\s|^)([-+]?(?:(?:\d+)\.\d+|\d+)(?:[eE][-+]?\d+)?) ?'
+        rf'({_trie_pattern(aliases)})(?![-°^"/\w])',
+        re.I | re.U
+    )
+
+
+# Case-folded alias to unit. Built once, so resolving a unit is a single
+# hash lookup.
+alias_index = _build_alias_index(alias2unit)
+
+unit_pattern = _compile_unit_pattern({*alias2unit, *alias_index})
+
 """
 Holds a unit of measurement.
 """
@@ -394,84 +533,99 @@ Measurement = collections.namedtuple('Measurement', [
     'dimension', 'magnitude', 'unit', 'alias'
 ])
 
+# Conversion tables for each dimension.
+dim_tables = _build_dimension_tables()
+
 
 def _find_unit_token(string_value):
     """
     Attempt to find the correct token for the unit string.
     If nothing is found, we return None.
     """
-    # Get the unit type
-    available_units = alias2unit.keys()
-    matched_unit_alias = None
-
-    for available_unit in available_units:
-        if string_value.strip() == available_unit.lower().strip():
-            matched_unit_alias = available_unit
-            break
+    string_value = string_value.strip()
+    unit = alias2unit.get(string_value)
+    if unit is None:
+        unit = alias_index.get(string_value.casefold())
+    return unit
 
-    if not matched_unit_alias:
-        # We didn't find a result.
-        return None
 
-    # Get the unit enum.
-    return alias2unit[matched_unit_alias]
+def _convert(magnitude: float, unit: Unit) -> typing.List[Measurement]:
+    """
+    Converts the magnitude in the given unit into every other unit in the
+    same dimension. This is a single multiply-add across the dimension's
+    coefficient arrays.
 
+    The list will not include the original unit.
 
-def _to_si(magnitude, unit):
-    """
-    Attempts to get the SI value for a given magnitude and unit.
-    If nothing compatible is found, we return None, otherwise we
-    return a Measurement namedtuple.
+    :raises ValueError: if the magnitude is out of range for the dimension,
+            such as a temperature below absolute zero.
     """
-    assert isinstance(unit, Unit), \
-        f'Incorrect type for Unit {unit} passed.'
-
-    magnitude_float = float(magnitude)
+    dimension = unit2dim[unit]
+    table = dim_tables[dimension]
+    scale, offset = unit2si_affine[unit]
 
-    # Get the SI conversion
-    conv = unit2si_conversion[unit]
+    si = magnitude * scale + offset
 
-    # Perform the conversion
-    conv_mag = conv(magnitude_float)
+    if dimension in dim2si_minimum:
+        minimum, name = dim2si_minimum[dimension]
+        if si < minimum:
+            si_alias = unit2display[dim2si[dimension]]
+            raise ValueError(
+                f'{si:g} {si_alias} is below {name}, and is invalid.')
 
-    # Get the dimension type
-    dimension = unit2dim[unit]
+    return [
+        Measurement(dimension, si * scale + offset, target, alias)
+        for target, scale, offset, alias in zip(table.units,
+                                                table.from_si_scales,
+                                                table.from_si_offsets,
+                                                table.aliases)
+        if target is not unit
+    ]
 
-    # Get the SI unit
-    si_unit = dim2si[dimension]
 
-    return Measurement(
-        dimension=dimension,
-        magnitude=conv_mag if conv_mag % 1 != 0 else int(conv_mag),
-        unit=si_unit,
-        alias=copy.deepcopy(unit2alias[si_unit][0]),
-    )
+@functools.lru_cache(maxsize=2048)
+def _convert_cached(magnitude: float, unit: Unit) -> typing.Tuple[Measurement]:
+    """
+    Memoised ``_convert``. The same measurements get pasted over and over,
+    so we keep the most recently used results around. Since the unit has
+    already been resolved from its alias, ``6ft`` and ``6 feet`` share an
+    entry. Errors are not cached.
+    """
+    return tuple(_convert(magnitude, unit))
 
 
-def _find_suitable_conversions(si_unit: Measurement):
+def _convert_batch(tokens: typing.Iterable[ConversionToken]) -> \
+        typing.List[
+            typing.Union[
+                typing.Tuple[Measurement, typing.List[Measurement]],
+                typing.Tuple[str, ValueError]
+            ]
+        ]:
     """
-    Given a measurement tuple of SI units, yield all
-    available conversions.
+    Converts many tokens in one call. Tokens with units we do not recognise
+    are dropped.
 
-    :param si_unit: the SI measurement to convert.
-    :return: a generator of conversions.
+    Each result is a tuple of the input measurement and a list of its
+    equivalent measurements. If a token is out of range for its dimension,
+    then a tuple of the input string and the ValueError is given instead.
     """
+    results = []
+    for token in tokens:
+        unit = _find_unit_token(token.unit)
 
-    # Ensure the passed unit is an SI unit in a Measurement tuple.
-    assert isinstance(si_unit, Measurement), \
-        f'Incorrect type for Unit {si_unit} passed.'
-    assert si_unit.unit in si2dim.keys(), \
-        f'{si_unit} is not an SI unit.'
-
-    for unit in dim2unit[si_unit.dimension]:
-        conv_mag = si2unit_conversion[unit](si_unit.magnitude)
+        if unit is None:
+            continue
 
-        yield Measurement(
-            dimension=si_unit.dimension,
-            magnitude=conv_mag,
-            unit=unit,
-            alias=unit2alias[unit][0]
-        )
+        try:
+            conversions = _convert_cached(token.magnitude, unit)
+        except ValueError as err:
+            results.append((f'{token.magnitude}{token.unit}', err))
+        else:
+            dimension = unit2dim[unit]
+            input_measurement = Measurement(
+                dimension, token.magnitude, unit, unit2display[unit])
+            results.append((input_measurement, conversions))
+    return results
 
 
 def _find_conversions(token: ConversionToken) \
@@ -499,35 +653,20 @@ def _find_conversions(token: ConversionToken) \
     if not isinstance(token, ConversionToken):
         raise TypeError(f'Expected conversion token, got {token}.')
 
-    unit: Unit = _find_unit_token(token.unit.lower())
+    unit: Unit = _find_unit_token(token.unit)
 
     if unit is None:
         # No match in the parser.
         return None
 
-    # Get the SI conversion
-    si = _to_si(token.magnitude, unit)
-
-    unit = Measurement(
+    input_measurement = Measurement(
         dimension=unit2dim[unit],
         magnitude=token.magnitude,
         unit=unit,
-        alias=unit2alias[unit][0]
+        alias=unit2display[unit]
     )
 
-    # Get all suitable conversions
-    gen = _find_suitable_conversions(si)
-
-    results = list(gen)
-
-    # Remove the original unit from the results.
-    i = 0
-    while i < len(results):
-        if results[i].unit == unit.unit:
-            results.pop(i)
-        i += 1
-
-    return unit, results
+    return input_measurement, _convert(token.magnitude, unit)
 
 
 def _find_any_conversions(string) -> \
@@ -543,29 +682,13 @@ def _find_any_conversions(string) -> \
     Each conversion is a tuple of the input conversion and any equivalent
     conversions as a list.
 
-    If any are valid conversions that have domain/range errors, then a TypeError
-    is returned instead.
+    If any are valid conversions that have domain/range errors, then a
+    ValueError is returned instead.
 
     :param string: the string to query.
-    :return: generator of each result tuple.
+    :return: iterator of each result tuple.
     """
-
-    for token in _find_tokens(string):
-        try:
-            result = _find_conversions(token)
-            if result is None:
-                continue
-
-            input_conv, other_conv = result
-
-            if input_conv in other_conv:
-                other_conv.remove(input_conv)
-
-        except ValueError as err:
-            m = token.magnitude
-            yield f'{m}{token.unit}', err
-        else:
-            yield (input_conv, other_conv)
+    return iter(_convert_batch(_find_tokens(string)))
 
 
 def _measurement_to_string(measurement: Measurement, should_round=True):
@@ -583,6 +706,121 @@ def _measurement_to_string(measurement: Measurement, should_round=True):
         return f'{round(measurement.magnitude, 2):,.2f} {measurement.alias}'
 
 
+# Cheap prefilter. Nothing can convert without a magnitude, so any message
+# without a single digit is not worth running the full pattern over.
+_has_digit = re.compile(r'\d', re.U)
+
+
+def _find_all_conversions(string) -> list:
+    """
+    Eagerly evaluates ``_find_any_conversions``. This is what we hand off to
+    the executor, as handing over the generator would just defer the actual
+    work back to whoever iterates it on the event loop.
+    """
+    return list(_find_any_conversions(string))
+
+
+_create_policy_table = '''
+CREATE TABLE IF NOT EXISTS nekozilla.conv_policy (
+  -- Snowflake of the guild or channel this policy applies to.
+  snowflake      BIGINT         PRIMARY KEY NOT NULL UNIQUE,
+
+  -- Snowflake of the guild the policy belongs to. For guild-wide policies
+  -- this is the same as the snowflake.
+  guild          BIGINT         NOT NULL,
+
+  -- Whether auto-conversion is enabled.
+  enabled        BOOLEAN        NOT NULL
+);
+'''
+
+
+class ConversionPolicy:
+    """
+    Holds whether auto-conversion is enabled for each guild and channel.
+
+    Policies are persisted in Postgres if the bot has a database, and are
+    otherwise held in memory only. Lookups never touch the database; each
+    channel's effective policy is resolved once and then cached, so checking
+    a message costs a single dict lookup.
+
+    A channel-level policy takes precedence over a guild-level one. If
+    neither exist, auto-conversion is enabled.
+    """
+    def __init__(self, bot: neko.NekoBot):
+        self.bot = bot
+
+        # Maps guild and channel snowflakes to their explicit policy.
+        self._overrides: typing.Dict[int, bool] = {}
+
+        # Maps channel snowflakes to their effective policy.
+        self._resolved: typing.Dict[int, bool] = {}
+
+    def is_enabled(self, channel) -> bool:
+        """True if auto-conversion is enabled in the given guild channel."""
+        try:
+            return self._resolved[channel.id]
+        except KeyError:
+            enabled = self._overrides.get(channel.id)
+            if enabled is None:
+                enabled = self._overrides.get(channel.guild.id, True)
+            self._resolved[channel.id] = enabled
+            return enabled
+
+    def explicit(self, snowflake: int) -> typing.Optional[bool]:
+        """Gets the explicit policy for the snowflake, if there is one."""
+        return self._overrides.get(snowflake)
+
+    async def load(self):
+        """Ensures the table exists, and reloads every policy from it."""
+        if self.bot.postgres_pool is None:
+            return
+
+        async with self.bot.postgres_pool.acquire() as conn:
+            await conn.execute(_create_policy_table)
+            records = await conn.fetch(
+                'SELECT snowflake, enabled FROM nekozilla.conv_policy;')
+
+        self._overrides = {r['snowflake']: r['enabled'] for r in records}
+        self._resolved.clear()
+
+    async def set(self,
+                  guild_id: int,
+                  snowflake: int,
+                  enabled: typing.Optional[bool]):
+        """
+        Sets the policy for the given guild or channel snowflake. If enabled
+        is None, the explicit policy is removed instead.
+        """
+        if self.bot.postgres_pool is not None:
+            async with self.bot.postgres_pool.acquire() as conn:
+                if enabled is None:
+                    await conn.execute(
+                        '''
+                        DELETE FROM nekozilla.conv_policy
+                        WHERE snowflake = ($1);
+                        ''',
+                        snowflake)
+                else:
+                    await conn.execute(
+                        '''
+                        INSERT INTO nekozilla.conv_policy
+                        VALUES (($1), ($2), ($3))
+                        ON CONFLICT (snowflake)
+                        DO UPDATE SET enabled = ($3);
+                        ''',
+                        snowflake, guild_id, enabled)
+
+        if enabled is None:
+            self._overrides.pop(snowflake, None)
+        else:
+            self._overrides[snowflake] = enabled
+
+        # Any channel could be affected by a guild-wide change, so just
+        # re-resolve everything lazily.
+        self._resolved.clear()
+
+
 @neko.inject_setup
 class AutoUnitConversionCog(neko.Cog):
     """
@@ -593,8 +831,185 @@ class AutoUnitConversionCog(neko.Cog):
                    perms.Permissions.READ_MESSAGES |
                    perms.Permissions.ADD_REACTIONS)
 
+    # Messages up to this many characters are scanned inline on the event
+    # loop. Anything longer is sent to the bot's thread pool instead.
+    inline_max_length = 400
+
+    # How long in seconds to suppress repeating an identical conversion in
+    # the same channel, and how many recent conversions to remember overall.
+    suppression_window = 120
+    suppression_max_entries = 4096
+
+    # How many replies to remember for editing if their source is edited.
+    reply_map_max_entries = 512
+
     def __init__(self, bot: neko.NekoBot):
         self.bot = bot
+        self.policy = ConversionPolicy(bot)
+
+        # Maps (channel, magnitude, unit) to the time the entry expires.
+        # Insertion order approximates expiry order, so we prune from the
+        # front.
+        self._recently_posted = collections.OrderedDict()
+
+        # Maps source message IDs to the reply we sent for them, so that
+        # we can edit the reply when the source is edited.
+        self._replies = collections.OrderedDict()
+
+        # Maps reply message IDs to the task listening for their close
+        # buttons, so we can stop listening if we delete the reply.
+        self._close_listeners = {}
+
+        # Latency histograms for each dispatch path. These are shown by
+        # ``sudo autoconv``.
+        self.dispatch_stats = {
+            'inline': neko.LogHistogram(),
+            'pool': neko.LogHistogram(),
+        }
+
+    async def _dispatch(self, content: str) -> list:
+        """
+        Finds all conversions in the given content.
+
+        Short messages are cheap enough to match inline, and doing so saves
+        queueing behind whatever else is occupying the thread pool. Long (or
+        otherwise pathological) content is matched in the pool so that it
+        cannot stall the event loop.
+        """
+        start_time = time.perf_counter()
+
+        if len(content) <= self.inline_max_length:
+            path = 'inline'
+            results = _find_all_conversions(content)
+        else:
+            path = 'pool'
+            results = await self.bot.do_job_in_pool(
+                _find_all_conversions, content)
+
+        self.dispatch_stats[path].record(time.perf_counter() - start_time)
+        return results
+
+    async def on_connect(self):
+        """Loads the conversion policies, if we have a database."""
+        await self.policy.load()
+
+    @neko.group(
+        name='autoconv',
+        brief='Shows or changes where units are automatically converted.',
+        usage='|on|off|reset [guild]',
+        invoke_without_command=True)
+    async def autoconv_group(self, ctx):
+        """
+        Shows whether automatic unit conversion is enabled in this channel,
+        and any explicit policies for the channel and guild.
+        """
+        if ctx.guild is None:
+            raise neko.NekoCommandError('This only applies to guilds.')
+
+        def describe(snowflake):
+            policy = self.policy.explicit(snowflake)
+            if policy is None:
+                return 'not set'
+            else:
+                return 'on' if policy else 'off'
+
+        state = 'on' if self.policy.is_enabled(ctx.channel) else 'off'
+
+        await ctx.send(
+            f'Automatic unit conversion is **{state}** here. '
+            f'Channel policy: {describe(ctx.channel.id)}. '
+            f'Guild policy: {describe(ctx.guild.id)}.')
+
+    @autoconv_group.command(
+        name='on',
+        brief='Enables automatic unit conversion.',
+        usage='[guild]')
+    async def autoconv_on(self, ctx, scope='channel'):
+        """
+        Enables automatic unit conversion in this channel, or the whole guild
+        if "guild" is given.
+        """
+        await self._set_policy(ctx, scope, True)
+
+    @autoconv_group.command(
+        name='off',
+        brief='Disables automatic unit conversion.',
+        usage='[guild]')
+    async def autoconv_off(self, ctx, scope='channel'):
+        """
+        Disables automatic unit conversion in this channel, or the whole guild
+        if "guild" is given.
+        """
+        await self._set_policy(ctx, scope, False)
+
+    @autoconv_group.command(
+        name='reset',
+        brief='Removes a policy, reverting to the default.',
+        usage='[guild]')
+    async def autoconv_reset(self, ctx, scope='channel'):
+        """
+        Removes the policy for this channel, or the whole guild if "guild"
+        is given. Channels fall back to the guild policy, and guilds fall back
+        to automatic conversion being enabled.
+        """
+        await self._set_policy(ctx, scope, None)
+
+    async def _set_policy(self, ctx, scope, enabled):
+        """
+        Validates the caller can change the policy for the given scope, and
+        then changes it.
+        """
+        if ctx.guild is None:
+            raise neko.NekoCommandError('This only applies to guilds.')
+
+        scope = scope.lower()
+        is_owner = ctx.author.id == ctx.bot.owner_id
+        perms_here = ctx.channel.permissions_for(ctx.author)
+
+        if scope == 'guild':
+            if not (is_owner or perms_here.manage_guild):
+                raise neko.NekoCommandError(
+                    'You need the Manage Server permission to do that.')
+            snowflake = ctx.guild.id
+        elif scope == 'channel':
+            if not (is_owner or perms_here.manage_channels):
+                raise neko.NekoCommandError(
+                    'You need the Manage Channels permission to do that.')
+            snowflake = ctx.channel.id
+        else:
+            raise neko.NekoCommandError('Expected "channel" or "guild".')
+
+        await self.policy.set(ctx.guild.id, snowflake, enabled)
+        await ctx.message.add_reaction('\N{OK HAND SIGN}')
+
+    def _suppress_duplicates(self, channel_id: int, results) -> list:
+        """
+        Removes any results that have already been posted in the given
+        channel within the suppression window, and remembers the rest as
+        having been posted.
+        """
+        now = time.monotonic()
+        recent = self._recently_posted
+
+        while recent:
+            key, expiry = next(iter(recent.items()))
+            if expiry > now and len(recent) <= self.suppression_max_entries:
+                break
+            del recent[key]
+
+        fresh = []
+        for input_val, conversions in results:
+            if not isinstance(conversions, ValueError):
+                key = (channel_id, input_val.magnitude, input_val.unit)
+
+                if recent.get(key, 0) > now:
+                    continue
+
+                recent[key] = now + self.suppression_window
+                recent.move_to_end(key)
+
+            fresh.append((input_val, conversions))
+        return fresh
 
     async def on_message(self, message):
         """
@@ -606,13 +1021,19 @@ class AutoUnitConversionCog(neko.Cog):
         if message.guild is None or message.author.bot:
             return
 
-        start_time = time.time()
-        results = await self.bot.do_job_in_pool(
-            _find_any_conversions, message.content)
-        results = list(results)
+        if not self.policy.is_enabled(message.channel):
+            return
+
+        # Nothing to do if there are no digits at all.
+        if not _has_digit.search(message.content):
+            return
 
-        # Measure runtime in microseconds
-        runtime = (time.time() - start_time) * 1e4
+        start_time = time.perf_counter()
+        results = await self._dispatch(message.content)
+        results = self._suppress_duplicates(message.channel.id, results)
+
+        # Measure runtime in milliseconds
+        runtime = (time.perf_counter() - start_time) * 1e3
 
         if not results:
             return
@@ -620,21 +1041,106 @@ class AutoUnitConversionCog(neko.Cog):
             self.logger.debug(f'Found {len(results)} potential conversions.')
             self.logger.debug(', '.join(map(str, results)))
 
-        embed = discord.Embed(color=neko.random_color())
+        embed = self._render_embed(results, runtime)
+
+        if embed.fields:
+            reply = await message.channel.send(embed=embed)
+            self._remember_reply(message.id, reply)
+            listener = asyncio.ensure_future(
+                self.close_button_listener(reply, message.id))
+            self._close_listeners[reply.id] = listener
+            listener.add_done_callback(
+                lambda _: self._close_listeners.pop(reply.id, None))
+
+    async def on_message_edit(self, before, after):
+        """
+        If a message we already replied to is edited, then we edit our reply
+        to match, rather than sending another one. Anything we had not
+        replied to is treated as a new message.
+        """
+        if after.guild is None or after.author.bot:
+            return
+
+        if not self.policy.is_enabled(after.channel):
+            return
+
+        # Embeds being unfurled also trigger edits. Ignore those.
+        if before.content == after.content:
+            return
+
+        reply = self._replies.get(after.id)
+
+        if reply is None:
+            return await self.on_message(after)
+
+        # If none of the measurements changed, then neither does our reply.
+        if _find_tokens(before.content) == _find_tokens(after.content):
+            return
+
+        # Unchanged tokens will hit the conversion cache, so only the changed
+        # ones actually get converted again.
+        start_time = time.perf_counter()
+        if _has_digit.search(after.content):
+            results = await self._dispatch(after.content)
+        else:
+            results = []
+        runtime = (time.perf_counter() - start_time) * 1e3
+
+        embed = self._render_embed(results, runtime)
+
+        try:
+            if embed.fields:
+                await reply.edit(embed=embed)
+            else:
+                # Nothing left to convert.
+                self._replies.pop(after.id, None)
+                self._stop_close_listener(reply)
+                await self.bot.deleter.delete(reply)
+        except discord.NotFound:
+            # Someone already deleted our reply.
+            self._replies.pop(after.id, None)
+            self._stop_close_listener(reply)
+
+    def _stop_close_listener(self, reply: discord.Message):
+        """
+        Stops listening for the close buttons on the reply. Cancelling the
+        listener also removes its waiter from the reaction router.
+        """
+        listener = self._close_listeners.pop(reply.id, None)
+        if listener is not None:
+            listener.cancel()
 
-        for tup in results:
-            input_val = tup[0]
-            # Sort in ascending order of magnitude
-            conversions = sorted(list(tup[1]),
-                                 key=lambda x: abs(-x.magnitude),
-                                 reverse=True)
+    def _remember_reply(self, source_id: int, reply: discord.Message):
+        """
+        Remembers the reply we sent to the given message ID so that we can
+        edit it later. Only the most recent replies are kept.
+        """
+        self._replies[source_id] = reply
+        self._replies.move_to_end(source_id)
 
-            should_round = abs(input_val.magnitude) > 1e-5
+        while len(self._replies) > self.reply_map_max_entries:
+            self._replies.popitem(last=False)
 
+    @staticmethod
+    def _render_embed(results, runtime) -> discord.Embed:
+        """
+        Renders the results of a conversion into an embed. If nothing was
+        worth displaying, the embed will not have any fields.
+        """
+        embed = discord.Embed(color=neko.random_color())
+
+        for input_val, conversions in results:
             if isinstance(conversions, ValueError):
                 conversions_str = str(conversions)
                 fw = input_val
             else:
+                # Sort in ascending order of magnitude
+                conversions = sorted(conversions,
+                                     key=lambda x: abs(-x.magnitude),
+                                     reverse=True)
+
+                should_round = abs(input_val.magnitude) > 1e-5
+
                 conversions_str = ''
                 for c in conversions:
                     # If magnitude is less than 10^-6 or greater
@@ -654,34 +1160,36 @@ class AutoUnitConversionCog(neko.Cog):
             text=t
         )
 
-        if embed.fields:
-            message = await message.channel.send(embed=embed)
-            asyncio.ensure_future(self.close_button_listener(message))
+        return embed
 
-    async def close_button_listener(self, msg: discord.Message):
+    async def close_button_listener(self, msg: discord.Message,
+                                    source_id: int = None):
         """
         Listens on a message for an 'X' button to be reacted by ANYONE.
         If this happens, the message is deleted. This lasts for 5 minutes.
 
         :param msg: the message to listen to.
+        :param source_id: the ID of the message we were replying to, if any.
+                This is forgotten if the reply gets deleted.
         """
         delete_rct = '\N{PUT LITTER IN ITS PLACE SYMBOL}'
         close_rct = '\N{SQUARED OK}'
 
-        await msg.add_reaction(close_rct)
-        await msg.add_reaction(delete_rct)
-        self.logger.debug('Created pagination reacts.')
+        pipeline = self.bot.reaction_pipeline
+        # Do not wait for the reacts to be added before listening.
+        adding = asyncio.ensure_future(
+            pipeline.reconcile(msg, (close_rct, delete_rct)))
+        self.logger.debug('Creating pagination reacts.')
 
         def predicate(r, u):
             return (
                 u.id != self.bot.user.id and
-                r.message.id == msg.id and
                 (r.emoji == delete_rct or r.emoji == close_rct)
             )
 
         try:
-            react, _ = await self.bot.wait_for(
-                'reaction_add',
+            react, _ = await self.bot.reaction_router.wait_for(
+                msg.id,
                 check=predicate,
                 # Timeout is 5 minutes.
                 timeout=5*60
@@ -689,11 +1197,21 @@ class AutoUnitConversionCog(neko.Cog):
 
             # If we get here, someone requested to close the conversion.
             if react.emoji == delete_rct:
-                await msg.delete()
+                self._replies.pop(source_id, None)
+                adding.cancel()
+                pipeline.forget(msg)
+                await self.bot.deleter.delete(msg)
             else:
-                await msg.clear_reactions()
+                await adding
+                await pipeline.clear(msg)
         except asyncio.TimeoutError:
             # If we timeout, we just clear the reactions.
-            await msg.clear_reactions()
+            await adding
+            await pipeline.clear(msg)
+        except asyncio.CancelledError:
+            # The reply is being deleted, so leave its reactions alone.
+            adding.cancel()
+            pipeline.forget(msg)
+            raise
         finally:
             self.logger.debug('Finished pagination element.')
@@ -1,6 +1,7 @@
 """
 Implementation of a help command.
 """
+import functools
 import inspect
 
 import neko
@@ -60,8 +61,6 @@ class HelpCog(neko.Cog):
         If a command name is passed as a parameter (`help command`) then the
         parameter is searched for as a command name and that page is opened.
         """
-        # TODO: maybe try to cache this! It's a fair amount of work each time.
-
         # Generates the book
         bk = neko.Book(ctx)
 
@@ -85,7 +84,9 @@ class HelpCog(neko.Cog):
         page_index = None
         for i, cmd in enumerate(cmds):
 
-            bk += await self.gen_spec_page(ctx, cmd)
+            # Pages are only rendered when someone actually looks at them.
+            bk.add_page_factory(
+                functools.partial(self.gen_spec_page, ctx, cmd))
 
             if page_index is None and query in cmd.qualified_names:
                 # I assume checking equality of commands is slower
@@ -11,7 +11,6 @@ import random
 import subprocess
 import sys
 import time
-import traceback
 import typing
 
 import neko
@@ -364,6 +363,256 @@ class OwnerOnlyCog(neko.Cog):
 
         await book.send()
 
+    @command_grp.command(
+        name='books',
+        brief='Lists books that are still listening for reactions.')
+    async def list_books(self, ctx):
+        """
+        Lists each open book, oldest first, with who opened it, where, how
+        many pages it holds, and roughly how much memory those take up.
+        """
+        manager = ctx.bot.book_manager
+        books = list(manager)
+        now = time.monotonic()
+        total = 0
+
+        book = neko.PaginatedBook(
+            ctx=ctx,
+            title=f'{len(books)} open books',
+            max_lines=15)
+
+        for open_book in books:
+            bk_ctx = open_book.context_invoked_from
+            size = open_book.approximate_size()
+            total += size
+            command = bk_ctx.command.qualified_name if bk_ctx.command else '?'
+            book.add_line(
+                f'`{command}` by {bk_ctx.author} in {bk_ctx.channel}, '
+                f'{len(open_book.pages)} pages, ~{size / 1024:,.1f} KiB, '
+                f'open for {now - open_book.opened_at:,.0f}s')
+
+        book.add_line()
+        book.add_line(
+            f'~{total / 1024:,.1f} KiB in total. At most '
+            f'{manager.max_per_user} per user and {manager.max_per_channel} '
+            f'per channel; {manager.evictions} evicted so far.')
+
+        await book.send()
+
+    @command_grp.command(
+        name='stats',
+        brief='Shows command latency and error counts, slowest first.')
+    async def command_stats(self, ctx):
+        """
+        Lists each command that has been invoked, sorted by the 99th
+        percentile of its total latency. Each shows how many times it has
+        been invoked and failed, and the 50th and 99th percentiles of the
+        time spent in its checks, argument conversion, body and sending.
+        """
+        book = neko.PaginatedBook(
+            ctx=ctx,
+            title='Command latency (p50/p99 in ms)',
+            max_lines=18)
+
+        for stats in ctx.bot.command_stats.by_p99():
+            book.add_line(
+                f'**{stats.name}**: {stats.invocations} calls, '
+                f'{stats.errors} errors')
+
+            phases = []
+            for phase in stats.phases:
+                histogram = stats.histograms[phase]
+                phases.append(
+                    f'{phase} {histogram.quantile(0.5) * 1e3:,.1f}/'
+                    f'{histogram.quantile(0.99) * 1e3:,.1f}')
+            book.add_line(f'\t{", ".join(phases)}', follow_with_empty=True)
+
+        if not len(ctx.bot.command_stats):
+            book.add_line('Nothing has been invoked yet.')
+
+        await book.send()
+
+    @command_grp.command(
+        name='listeners',
+        brief='Shows how long event listeners hold the loop, busiest first.')
+    async def listener_stats(self, ctx):
+        """
+        Lists each event listener that has run, sorted by the total time
+        it has spent running on the event loop. Time spent awaiting, such as
+        on sending a message, is not counted there; it is shown separately
+        as the wall time. Each also shows how many times it has run and
+        raised, and the most time, and the 99th percentile of the time, a
+        single call held the loop for. A listener near the top is the one
+        to look at if the bot feels sluggish.
+        """
+        book = neko.PaginatedBook(
+            ctx=ctx,
+            title='Event listeners (times in ms)',
+            max_lines=18)
+
+        for stats in ctx.bot.listener_stats.by_total_time():
+            book.add_line(
+                f'**{stats.name}**: {stats.calls} calls, {stats.errors} '
+                f'errors\n\ton loop {stats.total_time * 1e3:,.1f}, '
+                f'max {stats.max_time * 1e3:,.1f}, '
+                f'p99 {stats.p99() * 1e3:,.1f}; '
+                f'wall {stats.wall_time * 1e3:,.1f}',
+                follow_with_empty=True)
+
+        if not len(ctx.bot.listener_stats):
+            book.add_line('No listeners have run yet.')
+
+        await book.send()
+
+    @command_grp.command(
+        name='autoconv',
+        brief='Shows how long finding unit conversions takes, by path.')
+    async def autoconv_stats(self, ctx):
+        """
+        Shows how many messages the auto-conversion cog has scanned inline
+        on the event loop, and how many it sent to the thread pool, along
+        with the 50th and 99th percentile and worst time each path took.
+        Time taken in the pool includes any time spent queueing for it.
+        """
+        cog = ctx.bot.get_cog('AutoUnitConversionCog')
+        if cog is None:
+            raise neko.NekoCommandError('Auto-conversion is not loaded.')
+
+        lines = [f'Messages up to {cog.inline_max_length} characters long '
+                 'are scanned inline.']
+        for path, histogram in cog.dispatch_stats.items():
+            lines.append(
+                f'**{path}**: {histogram.count} messages, '
+                f'p50 {histogram.quantile(0.5) * 1e3:,.3f}ms, '
+                f'p99 {histogram.quantile(0.99) * 1e3:,.3f}ms, '
+                f'max {histogram.worst * 1e3:,.3f}ms')
+
+        await ctx.send('\n'.join(lines))
+
+    @command_grp.command(
+        name='lag',
+        usage='|stall number',
+        brief='Shows how responsive the event loop has been lately.')
+    async def loop_lag(self, ctx, stall: int = None):
+        """
+        With no arguments, this shows the distribution of event loop lag
+        measured by the watchdog over the last few minutes, and lists the
+        most recent times the loop was blocked. Give the number of one of
+        those to see the stack of whatever was blocking it.
+        """
+        watchdog = ctx.bot.watchdog
+        stalls = list(reversed(watchdog.stalls))
+
+        if stall is not None:
+            if not 0 < stall <= len(stalls):
+                raise neko.NekoCommandError('No such stall.')
+            entry = stalls[stall - 1]
+            duration = (f'{entry.lag:.3f}s' if entry.lag is not None
+                        else 'ongoing')
+            book = neko.PaginatedBook(
+                title=f'Blocked for {duration} at {entry.when:%H:%M:%S} in '
+                      f'{entry.task}',
+                ctx=ctx,
+                prefix='```python',
+                suffix='```')
+            book.add_lines(entry.stack or 'No stack was captured.')
+            await book.send()
+            return
+
+        lag = watchdog.lag.snapshot()
+        book = neko.PaginatedBook(
+            title=f'Event loop lag over the last '
+                  f'{watchdog.lag.span / 60:.0f} minutes',
+            ctx=ctx,
+            max_lines=20)
+
+        book.add_line(
+            f'{lag.count} samples; last {watchdog.last_lag * 1e3:,.2f}ms, '
+            f'p50 {lag.quantile(0.5) * 1e3:,.2f}ms, '
+            f'p99 {lag.quantile(0.99) * 1e3:,.2f}ms, '
+            f'max {lag.worst * 1e3:,.2f}ms',
+            follow_with_empty=True)
+
+        chart = []
+        widest = max(lag.counts)
+        for index, count in enumerate(lag.counts):
+            if count:
+                bar = '#' * max(1, round(20 * count / widest))
+                bound = lag.upper_bound(index) * 1e3
+                chart.append(
+                    f'\N{LESS-THAN OR EQUAL TO}{bound:>9,.2f}ms {bar} {count}')
+        if chart:
+            book.add_line('```\n' + '\n'.join(chart) + '\n```')
+
+        book.add_line(
+            f'Stalls over {watchdog.threshold}s (`sudo lag <number>` for the '
+            'stack):')
+        for number, entry in enumerate(stalls, start=1):
+            duration = (f'{entry.lag:.3f}s' if entry.lag is not None
+                        else 'ongoing')
+            book.add_line(
+                f'`{number}` {entry.when:%d %b %H:%M:%S}, {duration} in '
+                f'{entry.task}')
+        if not stalls:
+            book.add_line('None \N{SMILING FACE WITH SMILING EYES}')
+
+        await book.send()
+
+    @command_grp.command(
+        name='blockingio',
+        usage='|on|off|clear',
+        brief='Finds blocking I/O done on the event loop thread.')
+    async def blocking_io(self, ctx, action=None):
+        """
+        With no arguments, this lists the places in the bot that have opened
+        files, resolved host names, used blocking sockets, started processes
+        or slept on the event loop thread, most frequent first, along with
+        the cog and command responsible.
+
+        Pass `on` or `off` to switch detection on or off, or `clear` to
+        forget what has been found so far. Detection is off by default,
+        unless `detect_blocking_io` is set in the config.
+        """
+        detector = ctx.bot.blocking_io
+
+        if action is not None:
+            action = action.lower()
+            if action == 'on':
+                try:
+                    detector.enable()
+                except RuntimeError as ex:
+                    raise neko.NekoCommandError(str(ex)) from None
+            elif action == 'off':
+                detector.disable()
+            elif action == 'clear':
+                detector.clear()
+            else:
+                raise neko.NekoCommandError('Expected on, off or clear.')
+
+            await ctx.message.add_reaction('\N{OK HAND SIGN}')
+            return
+
+        state = 'on' if detector.enabled else 'off'
+        book = neko.PaginatedBook(
+            title=f'Blocking calls on the event loop (detection is {state})',
+            ctx=ctx,
+            max_lines=16)
+
+        for call in detector.calls():
+            book.add_line(
+                f'\N{MULTIPLICATION SIGN}{call.count} **{call.event}** '
+                f'`{call.detail}`\n'
+                f'\tat `{call.where}`\n'
+                f'\tcog {call.cog or "unknown"}, '
+                f'command {call.command or "none"}; '
+                f'last {call.last_seen:%d %b %H:%M:%S}',
+                follow_with_empty=True)
+
+        if not len(detector):
+            book.add_line('Nothing found.')
+
+        await book.send()
+
     @command_grp.command(
         name='uptime',
         brief='Says how long each bot has been running for.'
@@ -393,33 +642,66 @@ class OwnerOnlyCog(neko.Cog):
         await book.send()
 
     @staticmethod
-    async def __get_tb(ctx):
+    async def __get_tb(ctx, entry):
+        if entry is None:
+            await ctx.send('Nothing has broken \N{THINKING FACE}')
+            return
+
         book = neko.PaginatedBook(
-            title=f'Last traceback ({ctx.bot.last_error.date})', ctx=ctx,
+            title=f'Traceback {entry.fingerprint} (seen {entry.count} times, '
+                  f'last at {entry.last_seen})', ctx=ctx,
             prefix='```python', suffix='```')
-        if ctx.bot.last_error.value:
-            book.add_line(
-                ''.join(
-                    traceback.format_exception(
-                        ctx.bot.last_error.type,
-                        ctx.bot.last_error.value,
-                        ctx.bot.last_error.traceback)))
-        else:
-            book.add_lines('Nothing has broken \N{THINKING FACE}')
+        # Formatting reads source files, so keep it off the event loop. The
+        # entry keeps changing on the loop, so take the error out of it first.
+        error = entry.type, entry.value, entry.traceback
+        book.add_lines(await ctx.bot.do_job_in_pool(neko.format_error, *error))
         await book.send()
 
     @neko.command(
         name='tb',
         brief='Prints the most recent traceback.')
     async def get_tb(self, ctx):
-        await self.__get_tb(ctx)
+        await self.__get_tb(ctx, ctx.bot.errors.last)
 
-    # Deprecated.
     @command_grp.command(
         name='tb',
-        brief='Prints the most recent traceback.')
-    async def get_tb_sudo(self, ctx):
-        await self.__get_tb(ctx)
+        usage='|fingerprint',
+        brief='Lists the most common errors, or shows one of them.')
+    async def get_tb_sudo(self, ctx, fingerprint=None):
+        """
+        With no arguments, this lists the fingerprints of the errors that
+        have occurred most often. Give a fingerprint, or the start of one,
+        to see the most recent traceback for it.
+        """
+        errors = ctx.bot.errors
+
+        if fingerprint is not None:
+            entry = errors.find(fingerprint)
+            if entry is None:
+                raise neko.NekoCommandError('No such fingerprint.')
+            await self.__get_tb(ctx, entry)
+            return
+
+        book = neko.PaginatedBook(
+            title=f'Top errors ({len(errors)} fingerprints)',
+            ctx=ctx,
+            max_lines=10)
+
+        for entry in errors.top():
+            where = entry.command or 'no command'
+            if entry.guild is not None:
+                where += f' in {entry.guild}'
+            book.add_line(
+                f'`{entry.fingerprint}` \N{MULTIPLICATION SIGN}{entry.count} '
+                f'**{entry.type.__name__}**: '
+                f'{neko.ellipses(str(entry.value), 100)}\n'
+                f'\t{where}; first {entry.first_seen:%d %b %H:%M:%S}, '
+                f'last {entry.last_seen:%d %b %H:%M:%S}')
+
+        if not len(errors):
+            book.add_line('Nothing has broken \N{THINKING FACE}')
+
+        await book.send()
 
     # noinspection PyProtectedMember
     @command_grp.command(
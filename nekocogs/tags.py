@@ -1,9 +1,9 @@
 """
 Tag implementation using PostgreSQL backend for storage and management.
 """
-import asyncio
 import base64
 import copy
+import functools
 import io
 import math
 import re
@@ -110,39 +110,65 @@ class TagCog(neko.Cog):
             await conn.execute(_create_attachment_table)
 
     @staticmethod
-    async def _del_msg_soon(send_msg=None, resp_msg=None):
-        await asyncio.sleep(5)
-
+    async def _del_msg_soon(send_msg: neko.Context, resp_msg):
         # Reverse delete.
-        for x in (resp_msg, send_msg):
-            if isinstance(x, neko.Context):
-                x = x.message
-            await x.delete()
+        send_msg.bot.scheduler.delete_later(5, resp_msg, send_msg.message)
+
+    # Number of tags to list on each page.
+    _tags_per_page = 15
+
+    @classmethod
+    async def _add_tag_list_to_pag(cls, ctx, book):
+        """
+        Adds pages listing the available tags to the book. We only count the
+        tags up front; each page fetches its own tags the first time it is
+        shown.
+        """
+        is_owner = ctx.author.id == ctx.bot.owner_id
+
+        # Hides NSFW commands from regular users unless in NSFW channels.
+        show_nsfw = ctx.channel.nsfw or is_owner
 
-    @staticmethod
-    async def _add_tag_list_to_pag(ctx, book):
         async with ctx.bot.postgres_pool.acquire() as conn:
-            results = await conn.fetch(
+            count = await conn.fetchval(
                 '''
-                SELECT name, is_nsfw, guild IS NULL as is_global
+                SELECT COUNT(*)
                 FROM nekozilla.tags
-                WHERE guild IS NULL OR guild = ($1)
-                ORDER BY name, created;
+                WHERE (guild IS NULL OR guild = ($1))
+                    AND (NOT is_nsfw OR ($2));
                 ''',
-                ctx.guild.id)
+                ctx.guild.id, show_nsfw)
+
+        async def render(offset):
+            async with ctx.bot.postgres_pool.acquire() as conn:
+                results = await conn.fetch(
+                    '''
+                    SELECT name, is_nsfw, guild IS NULL as is_global
+                    FROM nekozilla.tags
+                    WHERE (guild IS NULL OR guild = ($1))
+                        AND (NOT is_nsfw OR ($2))
+                    ORDER BY name, created
+                    LIMIT ($3) OFFSET ($4);
+                    ''',
+                    ctx.guild.id, show_nsfw, cls._tags_per_page, offset)
+
+            lines = []
             for result in results:
                 name = result['name']
                 if result['is_global']:
                     name = f'*{name}*'
                 if result['is_nsfw'] and not ctx.channel.nsfw:
-                    # Hides NSFW commands from regular users unless in NSFW
-                    # channels.
-                    if ctx.author.id == ctx.bot.owner_id:
-                        name = f'~~{name}~~'
-                    else:
-                        continue
+                    # Only the owner gets here.
+                    name = f'~~{name}~~'
+
+                lines.append(f'- {name}')
 
-                book.add_line(f'- {name}')
+            return neko.Page(
+                title='Tags' if offset == 0 else neko.EmptyEmbedField,
+                description='\n'.join(lines))
+
+        for offset in range(0, count, cls._tags_per_page):
+            book.add_page_factory(functools.partial(render, offset))
 
     @neko.group(
         name='tag',
@@ -178,7 +204,7 @@ class TagCog(neko.Cog):
         ${guild_id} -> shows the ID of the guild (server) the tag is called on.
         """
         if tag_name is None:
-            book = neko.PaginatedBook(ctx=ctx, title='Tags', max_lines=15)
+            book = neko.Book(ctx)
 
             desc = f'Run {ctx.prefix}help tag <command> for more info.\n\n'
 
@@ -855,7 +881,7 @@ class TagCog(neko.Cog):
         """
         This lists bot local and global tags.
         """
-        book = neko.PaginatedBook(ctx=ctx, title='Tags', max_lines=15)
+        book = neko.Book(ctx)
 
         async with ctx.typing():
             await self._add_tag_list_to_pag(ctx, book)